@@ -19,11 +19,16 @@
 #
 # ##### END GPL LICENSE BLOCK #####
 
+# Has to be imported first to see all the other imports when startup profiling is enabled
+from . import startup_profiler
+from . import logging_setup
 from . import addon_updater_ops
 import bpy
 import sys
 import os
 import random
+import dataclasses
+import time
 import typing
 import tempfile
 import logging
@@ -32,40 +37,41 @@ import importlib
 
 root_logger = logging.getLogger("polygoniq")
 logger = logging.getLogger(f"polygoniq.{__name__}")
-if not getattr(root_logger, "polygoniq_initialized", False):
-    root_logger_formatter = logging.Formatter(
-        "P%(process)d:%(asctime)s:%(name)s:%(levelname)s: [%(filename)s:%(lineno)d] %(message)s",
-        "%H:%M:%S",
-    )
-    try:
-        root_logger.setLevel(int(os.environ.get("POLYGONIQ_LOG_LEVEL", "20")))
-    except (ValueError, TypeError):
-        root_logger.setLevel(20)
-    root_logger.propagate = False
-    root_logger_stream_handler = logging.StreamHandler()
-    root_logger_stream_handler.setFormatter(root_logger_formatter)
-    root_logger.addHandler(root_logger_stream_handler)
-    try:
-        log_path = os.path.join(tempfile.gettempdir(), "polygoniq_logs")
-        os.makedirs(log_path, exist_ok=True)
-        root_logger_handler = logging.handlers.TimedRotatingFileHandler(
-            os.path.join(log_path, f"blender_addons.txt"),
-            when="h",
-            interval=1,
-            backupCount=2,
-            utc=True,
+with startup_profiler.section("logging setup"):
+    if not getattr(root_logger, "polygoniq_initialized", False):
+        root_logger_formatter = logging.Formatter(
+            "P%(process)d:%(asctime)s:%(name)s:%(levelname)s: [%(filename)s:%(lineno)d] %(message)s",
+            "%H:%M:%S",
         )
-        root_logger_handler.setFormatter(root_logger_formatter)
-        root_logger.addHandler(root_logger_handler)
-    except:
-        logger.exception(
-            f"Can't create rotating log handler for polygoniq root logger "
-            f"in module \"{__name__}\", file \"{__file__}\""
+        try:
+            root_logger.setLevel(int(os.environ.get("POLYGONIQ_LOG_LEVEL", "20")))
+        except (ValueError, TypeError):
+            root_logger.setLevel(20)
+        root_logger.propagate = False
+        root_logger_stream_handler = logging.StreamHandler()
+        root_logger_stream_handler.setFormatter(root_logger_formatter)
+        root_logger.addHandler(root_logger_stream_handler)
+        try:
+            log_path = os.path.join(tempfile.gettempdir(), "polygoniq_logs")
+            os.makedirs(log_path, exist_ok=True)
+            root_logger_handler = logging.handlers.TimedRotatingFileHandler(
+                os.path.join(log_path, f"blender_addons.txt"),
+                when="h",
+                interval=1,
+                backupCount=2,
+                utc=True,
+            )
+            root_logger_handler.setFormatter(root_logger_formatter)
+            root_logger.addHandler(root_logger_handler)
+        except:
+            logger.exception(
+                f"Can't create rotating log handler for polygoniq root logger "
+                f"in module \"{__name__}\", file \"{__file__}\""
+            )
+        setattr(root_logger, "polygoniq_initialized", True)
+        logger.info(
+            f"polygoniq root logger initialized in module \"{__name__}\", file \"{__file__}\" -----"
         )
-    setattr(root_logger, "polygoniq_initialized", True)
-    logger.info(
-        f"polygoniq root logger initialized in module \"{__name__}\", file \"{__file__}\" -----"
-    )
 
 
 # To comply with extension encapsulation, after the addon initialization:
@@ -94,7 +100,8 @@ try:
     }
     for dependency in dependencies:
         logger.debug(f"Importing additional dependency {dependency}")
-        dependency_module = importlib.import_module(dependency)
+        with startup_profiler.section(f"import additional dependency {dependency}"):
+            dependency_module = importlib.import_module(dependency)
         local_module_name = f"{__package__}.{dependency}"
         sys.modules[local_module_name] = dependency_module
     for module_name in list(sys.modules.keys()):
@@ -126,12 +133,98 @@ bl_info = {
     "category": "System",
 }
 telemetry = polib.get_telemetry("blenderkitty")
-telemetry.report_addon(bl_info, __file__)
+with startup_profiler.section("telemetry.report_addon"):
+    telemetry.report_addon(bl_info, __file__)
 
 
 ADDON_CLASSES: typing.List[typing.Type] = []
 
 
+@dataclasses.dataclass
+class RegionRecord:
+    screen_pointer: int
+    last_drawn: float
+    # Time of the last redraw we requested, None if the region wasn't tagged since it last drew
+    last_tagged: typing.Optional[float] = None
+
+
+class PanelRegionRegistry:
+    """Tracks UI regions in which a panel was drawn recently.
+
+    Regions are stored as pointers, never as bpy structs, those may dangle after the screen
+    changes. A record expires when its screen isn't shown in any window anymore, or when we tagged
+    the region for redraw and the panel didn't draw within 'redraw_timeout' seconds - e.g. the
+    panel was collapsed, another sidebar tab was selected or the sidebar was hidden.
+    """
+
+    def __init__(self, redraw_timeout: float = 1.0):
+        self.redraw_timeout = redraw_timeout
+        self.records: typing.Dict[int, RegionRecord] = {}
+
+    def mark_drawn(self, context: bpy.types.Context) -> None:
+        if context.region is None or context.screen is None:
+            return
+
+        self.records[context.region.as_pointer()] = RegionRecord(
+            context.screen.as_pointer(), time.monotonic()
+        )
+
+    def prune(self, shown_screens: typing.Iterable[bpy.types.Screen]) -> None:
+        """Removes records of regions that are hidden or belong to screens not shown anymore"""
+        shown_screen_pointers = {screen.as_pointer() for screen in shown_screens}
+        now = time.monotonic()
+        for region_pointer, record in list(self.records.items()):
+            if record.screen_pointer not in shown_screen_pointers:
+                del self.records[region_pointer]
+            elif record.last_tagged is not None and now - record.last_tagged > self.redraw_timeout:
+                del self.records[region_pointer]
+
+    def get_regions(self, screen: bpy.types.Screen) -> typing.List[bpy.types.Region]:
+        if len(self.records) == 0:
+            return []
+
+        regions = []
+        for area in screen.areas:
+            if area.type != 'VIEW_3D':
+                continue
+            for region in area.regions:
+                if region.type == 'UI' and region.as_pointer() in self.records:
+                    regions.append(region)
+        return regions
+
+    def tag_redraw(self, region: bpy.types.Region) -> None:
+        record = self.records.get(region.as_pointer(), None)
+        if record is None:
+            return
+
+        region.tag_redraw()
+        if record.last_tagged is None:
+            record.last_tagged = time.monotonic()
+
+    def clear(self) -> None:
+        self.records.clear()
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+
+# Sidebar regions in which the blenderkitty panel is currently visible
+VISIBLE_PANEL_REGIONS = PanelRegionRegistry()
+
+
+def get_shown_screens() -> typing.List[bpy.types.Screen]:
+    screens = []
+    for window_manager in bpy.data.window_managers:
+        for window in window_manager.windows:
+            if window.screen is not None:
+                screens.append(window.screen)
+    return screens
+
+
+def on_screen_changed() -> None:
+    VISIBLE_PANEL_REGIONS.prune(get_shown_screens())
+
+
 @polib.log_helpers_bpy.logged_panel
 class BlenderKittyPanel(bpy.types.Panel):
     bl_idname = "VIEW_3D_PT_blenderkitty"
@@ -160,6 +253,9 @@ class BlenderKittyPanel(bpy.types.Panel):
         )
 
     def draw(self, context: bpy.types.Context):
+        # Only 'draw' marks the region, collapsed panel draws just its header
+        VISIBLE_PANEL_REGIONS.mark_drawn(context)
+
         prefs = preferences.get_preferences(context)
         prefs.ensure_valid_enum_items(context)
 
@@ -205,13 +301,19 @@ ADDON_CLASSES.append(BlenderKittyPanel)
 
 
 def blenderkitty_tick() -> None:
+    shown_screens = get_shown_screens()
+    VISIBLE_PANEL_REGIONS.prune(shown_screens)
+    regions = [
+        region for screen in shown_screens for region in VISIBLE_PANEL_REGIONS.get_regions(screen)
+    ]
+    # Nobody can see the cat, no need to change it
+    if len(regions) == 0:
+        return
+
     prefs = preferences.get_preferences(bpy.context)
     prefs.randomize_cat(bpy.context)
-    for area in bpy.context.screen.areas:
-        if area.type == 'VIEW_3D':
-            for region in area.regions:
-                if region.type == 'UI':
-                    region.tag_redraw()
+    for region in regions:
+        VISIBLE_PANEL_REGIONS.tag_redraw(region)
 
 
 def blenderkitty_tick_wrapper() -> float:
@@ -231,20 +333,49 @@ def blenderkitty_tick_wrapper() -> float:
 
 
 def register():
-    # We pass mock "bl_info" to the updater, since Blender 4.2.0 the "bl_info" is no longer
-    # available in this scope.
-    addon_updater_ops.register({"version": (2, 0, 1)})
-
-    preferences.register()
-    cat_drawer.register()
-
-    for cls in ADDON_CLASSES:
-        bpy.utils.register_class(cls)
-
-    bpy.app.timers.register(blenderkitty_tick_wrapper, first_interval=10.0, persistent=True)
+    # Console and file I/O is done by a listener thread, see logging_setup. Acquired here and not
+    # on import so that it pairs with the release in unregister.
+    logging_setup.acquire_root_logger(root_logger)
+    try:
+        with startup_profiler.section("register"):
+            with startup_profiler.section("addon_updater_ops.register"):
+                # We pass mock "bl_info" to the updater, since Blender 4.2.0 the "bl_info" is no
+                # longer available in this scope.
+                addon_updater_ops.register({"version": (2, 0, 1)})
+
+            with startup_profiler.section("preferences.register"):
+                preferences.register()
+            with startup_profiler.section("cat_drawer.register"):
+                cat_drawer.register()
+
+            with startup_profiler.section("register ADDON_CLASSES"):
+                for cls in ADDON_CLASSES:
+                    bpy.utils.register_class(cls)
+
+            for key in [(bpy.types.Window, "screen"), (bpy.types.Window, "workspace")]:
+                bpy.msgbus.subscribe_rna(
+                    key=key,
+                    owner=VISIBLE_PANEL_REGIONS,
+                    args=(),
+                    notify=on_screen_changed,
+                    options={'PERSISTENT'},
+                )
+
+            polib.timers_bpy.TIMER_REGISTRY.register(
+                __name__, blenderkitty_tick_wrapper, first_interval=10.0, persistent=True
+            )
+    except:
+        # Blender doesn't call unregister if register fails
+        logging_setup.release_root_logger(root_logger)
+        raise
+    finally:
+        startup_profiler.finish()
 
 
 def unregister():
+    bpy.msgbus.clear_by_owner(VISIBLE_PANEL_REGIONS)
+    VISIBLE_PANEL_REGIONS.clear()
+
     for cls in reversed(ADDON_CLASSES):
         bpy.utils.unregister_class(cls)
 
@@ -257,7 +388,8 @@ def unregister():
         if module_name.startswith(__package__):
             del sys.modules[module_name]
 
-    if bpy.app.timers.is_registered(blenderkitty_tick_wrapper):
-        bpy.app.timers.unregister(blenderkitty_tick_wrapper)
+    polib.timers_bpy.TIMER_REGISTRY.unregister_owner(__name__)
 
     addon_updater_ops.unregister()
+
+    logging_setup.release_root_logger(root_logger)
@@ -24,7 +24,7 @@ https://github.com/CGCookie/blender-addon-updater
 
 __version__ = "1.1.1"
 
-import errno
+import concurrent.futures
 import traceback
 import platform
 import ssl
@@ -36,12 +36,31 @@ import zipfile
 import shutil
 import threading
 import fnmatch
+import time
+import zlib
+import http.client
 from datetime import datetime, timedelta
 
 # Blender imports, used in limited cases.
 import bpy
 import addon_utils
 
+# Update downloads read the response in chunks sized so that each read takes
+# roughly DOWNLOAD_CHUNK_TARGET_TIME seconds on the current connection.
+DOWNLOAD_MIN_CHUNK = 64 * 1024
+DOWNLOAD_MAX_CHUNK = 4 * 1024 * 1024
+DOWNLOAD_CHUNK_TARGET_TIME = 0.25
+# Interrupted downloads are resumed this many times before giving up.
+DOWNLOAD_RETRIES = 5
+DOWNLOAD_RETRY_DELAY = 2.0
+# Blender is frozen while the main thread waits, retries there wait at most
+# this long each, so all retries together take a few seconds at most.
+DOWNLOAD_MAX_MAIN_THREAD_RETRY_DELAY = 0.5
+# Update files are extracted and installed files are checked in chunks of
+# this size, extraction runs in EXTRACT_WORKERS threads.
+FILE_CHUNK_SIZE = 1024 * 1024
+EXTRACT_WORKERS = 4
+
 # -----------------------------------------------------------------------------
 # The main class
 # -----------------------------------------------------------------------------
@@ -98,6 +117,8 @@ class SingletonUpdater:
         self._verbose = False
         self._use_print_traces = True
         self._fake_install = False
+        # Only replace files that differ from the installed ones on update.
+        self._delta_update = True
         self._async_checking = False  # only true when async daemon started
         self._update_ready = None
         self._update_link = None
@@ -123,6 +144,14 @@ class SingletonUpdater:
         self.show_popups = True  # UI uses to show popups or not.
         self.invalid_updater = False
 
+        # Progress of the running update download. Progress is a fraction
+        # 0-1, None if the server didn't send the size, speed is in bytes
+        # per second. The callback is called as callback(downloaded, total,
+        # speed) after each chunk, total may be None.
+        self.download_progress = None
+        self.download_speed = 0.0
+        self.download_progress_callback = None
+
         # pre-assign basic select-link function
         def select_link_function(self, tag):
             return tag["zipball_url"]
@@ -263,6 +292,16 @@ class SingletonUpdater:
             raise ValueError("fake_install must be a boolean value")
         self._fake_install = bool(value)
 
+    @property
+    def delta_update(self):
+        return self._delta_update
+
+    @delta_update.setter
+    def delta_update(self, value):
+        if not isinstance(value, bool):
+            raise ValueError("delta_update must be a boolean value")
+        self._delta_update = bool(value)
+
     # not currently used
     @property
     def include_branch_auto_check(self):
@@ -659,30 +698,51 @@ class SingletonUpdater:
 
     def get_raw(self, url):
         """All API calls to base url."""
-        request = urllib.request.Request(url)
+        result = self.request_api(url, parse_json=False)
+        if result is None:
+            return None
+        return result.decode()
+
+    def get_api(self, url):
+        """Result of all api calls, decoded into json format."""
         try:
-            context = ssl._create_unverified_context()
-        except:
-            # Some blender packaged python versions don't have this, largely
-            # useful for local network setups otherwise minimal impact.
-            context = None
+            return self.request_api(url, parse_json=True)
+        except ValueError as e:
+            self._error = "API response has invalid JSON format"
+            self._error_msg = str(e)
+            self._update_ready = None
+            print(self._error, self._error_msg)
+            self.print_trace()
+            return None
+
+    def request_api(self, url, parse_json):
+        """GET url through the shared HTTP session, None on errors.
+
+        The session keeps connections alive between the API calls and
+        revalidates cached responses with ETags, an unchanged response
+        costs a 304 and isn't parsed again. Responses to requests with a
+        token are not cached.
+        """
+        # polib is imported into the addon package only after the updater
+        from . import polib
 
+        headers = dict()
         # Setup private request headers if appropriate.
         if self._engine.token is not None:
             if self._engine.name == "gitlab":
-                request.add_header('PRIVATE-TOKEN', self._engine.token)
+                headers['PRIVATE-TOKEN'] = self._engine.token
             else:
                 self.print_verbose("Tokens not setup for engine yet")
 
         # Always set user agent.
-        request.add_header('User-Agent', "Python/" + str(platform.python_version()))
+        headers['User-Agent'] = "Python/" + str(platform.python_version())
 
         # Run the request.
+        session = polib.http_session.HTTP_SESSION
         try:
-            if context:
-                result = urllib.request.urlopen(request, context=context)
-            else:
-                result = urllib.request.urlopen(request)
+            if parse_json:
+                return session.get_json(url, headers)
+            return session.get(url, headers)
         except urllib.error.HTTPError as e:
             if str(e.code) == "403":
                 self._error = "HTTP error (access denied)"
@@ -694,6 +754,7 @@ class SingletonUpdater:
                 print(self._error, self._error_msg)
             self.print_trace()
             self._update_ready = None
+            return None
         except urllib.error.URLError as e:
             reason = str(e.reason)
             if "TLSV1_ALERT" in reason or "SSL" in reason.upper():
@@ -707,27 +768,6 @@ class SingletonUpdater:
             self.print_trace()
             self._update_ready = None
             return None
-        else:
-            result_string = result.read()
-            result.close()
-            return result_string.decode()
-
-    def get_api(self, url):
-        """Result of all api calls, decoded into json format."""
-        get = None
-        get = self.get_raw(url)
-        if get is not None:
-            try:
-                return json.JSONDecoder().decode(get)
-            except Exception as e:
-                self._error = "API response has invalid JSON format"
-                self._error_msg = str(e.reason)
-                self._update_ready = None
-                print(self._error, self._error_msg)
-                self.print_trace()
-                return None
-        else:
-            return None
 
     def stage_repository(self, url):
         """Create a working directory and download the new files"""
@@ -764,20 +804,7 @@ class SingletonUpdater:
         self._source_zip = os.path.join(local, "source.zip")
         self.print_verbose("Starting download update zip")
         try:
-            request = urllib.request.Request(url)
-            context = ssl._create_unverified_context()
-
-            # Setup private token if appropriate.
-            if self._engine.token is not None:
-                if self._engine.name == "gitlab":
-                    request.add_header('PRIVATE-TOKEN', self._engine.token)
-                else:
-                    self.print_verbose("Tokens not setup for selected engine yet")
-
-            # Always set user agent
-            request.add_header('User-Agent', "Python/" + str(platform.python_version()))
-
-            self.url_retrieve(urllib.request.urlopen(request, context=context), self._source_zip)
+            self.download_resumable(url, self._source_zip)
             # Add additional checks on file size being non-zero.
             self.print_verbose("Successfully downloaded update zip")
             return True
@@ -853,6 +880,12 @@ class SingletonUpdater:
         shutil.rmtree(self._addon_root)
         os.rename(tempdest, self._addon_root)
 
+        # The manifest describes the files of the replaced version.
+        try:
+            os.remove(self.get_installed_manifest_path())
+        except OSError:
+            pass
+
         self._json["backup_date"] = ""
         self._json["just_restored"] = True
         self._json["just_updated"] = True
@@ -907,28 +940,71 @@ class SingletonUpdater:
             # this avoids adding the first subfolder to the path length,
             # which can be too long if the download has the SHA in the name.
             zsep = '/'  # Not using os.sep, always the / value even on windows.
-            for name in zfile.namelist():
+            members = []  # (zip info, path without the top folder)
+            for info in zfile.infolist():
+                name = info.filename
                 if zsep not in name:
                     continue
                 top_folder = name[: name.index(zsep) + 1]
                 if name == top_folder + zsep:
                     continue  # skip top level folder
-                sub_path = name[name.index(zsep) + 1 :]
-                if name.endswith(zsep):
-                    try:
-                        os.mkdir(os.path.join(outdir, sub_path))
-                        self.print_verbose("Extract - mkdir: " + os.path.join(outdir, sub_path))
-                    except OSError as exc:
-                        if exc.errno != errno.EEXIST:
-                            self._error = "Install failed"
-                            self._error_msg = "Could not create folder from zip"
-                            self.print_trace()
-                            return -1
+                members.append((info, name[name.index(zsep) + 1 :]))
+
+            # Either directly in root of zip/one subfolder, or use specified
+            # path. Validated from the zip listing, unchanged files including
+            # the __init__.py may not be extracted at all.
+            sub_paths = [sub_path for _, sub_path in members]
+            addon_prefix = self.get_addon_prefix(sub_paths)
+            if addon_prefix + "__init__.py" not in sub_paths:
+                print("Not a valid addon found")
+                print("Paths:")
+                print(sorted({sub_path.split(zsep)[0] for sub_path in sub_paths}))
+                self._error = "Install failed"
+                self._error_msg = "No __init__ file found in new source"
+                return -1
+
+            # Files of the addon, relative to its root -> zip info.
+            addon_files = {
+                sub_path[len(addon_prefix) :]: info
+                for info, sub_path in members
+                if sub_path.startswith(addon_prefix) and not info.filename.endswith(zsep)
+            }
+            unchanged = set()
+            if self._delta_update and not clean:
+                unchanged = self.find_unchanged_files(addon_files)
+            # Names in the zip, only files in the addon folder can be skipped.
+            unchanged_names = {addon_files[rel_path].filename for rel_path in unchanged}
+
+            # Folders are created upfront, including the ones without their
+            # own entry in the zip, the files are then extracted in parallel.
+            targets = dict()  # target path -> zip info, the last one wins
+            for info, sub_path in members:
+                target = os.path.join(outdir, sub_path)
+                if info.filename.endswith(zsep):
+                    folder = target
+                elif info.filename in unchanged_names:
+                    # Same as the installed file, nothing to replace.
+                    continue
                 else:
-                    with open(os.path.join(outdir, sub_path), "wb") as outfile:
-                        data = zfile.read(name)
-                        outfile.write(data)
-                        self.print_verbose("Extract - create: " + os.path.join(outdir, sub_path))
+                    folder = os.path.dirname(target)
+                    targets[target] = info
+                try:
+                    if not os.path.isdir(folder):
+                        os.makedirs(folder)
+                        self.print_verbose("Extract - mkdir: " + folder)
+                except OSError:
+                    self._error = "Install failed"
+                    self._error_msg = "Could not create folder from zip"
+                    self.print_trace()
+                    return -1
+
+        try:
+            self.extract_zip_files(targets)
+        except Exception:
+            self._error = "Install failed"
+            self._error_msg = "Could not extract files from zip"
+            self.print_trace()
+            return -1
 
         self.print_verbose("Extracted source")
 
@@ -939,32 +1015,17 @@ class SingletonUpdater:
             print("Extracted path does not exist: ", unpath)
             return -1
 
-        if self._subfolder_path:
-            self._subfolder_path.replace('/', os.path.sep)
-            self._subfolder_path.replace('\\', os.path.sep)
-
-        # Either directly in root of zip/one subfolder, or use specified path.
-        if not os.path.isfile(os.path.join(unpath, "__init__.py")):
-            dirlist = os.listdir(unpath)
-            if len(dirlist) > 0:
-                if self._subfolder_path == "" or self._subfolder_path is None:
-                    unpath = os.path.join(unpath, dirlist[0])
-                else:
-                    unpath = os.path.join(unpath, self._subfolder_path)
-
-            # Smarter check for additional sub folders for a single folder
-            # containing the __init__.py file.
-            if not os.path.isfile(os.path.join(unpath, "__init__.py")):
-                print("Not a valid addon found")
-                print("Paths:")
-                print(dirlist)
-                self._error = "Install failed"
-                self._error_msg = "No __init__ file found in new source"
-                return -1
+        # The addon folder has no entry of its own in zips without directory
+        # entries and may be left empty if all of its files are unchanged.
+        unpath = os.path.join(unpath, *addon_prefix.split(zsep))
+        os.makedirs(unpath, exist_ok=True)
 
         # Merge code with the addon directory, using blender default behavior,
         # plus any modifiers indicated by user (e.g. force remove/keep).
-        self.deep_merge_directory(self._addon_root, unpath, clean)
+        keep_files = {self.get_installed_file_path(rel_path) for rel_path in unchanged}
+        self.deep_merge_directory(self._addon_root, unpath, clean, keep_files)
+        if self._delta_update:
+            self.save_installed_manifest(addon_files, unchanged, unpath)
 
         # Now save the json state.
         # Change to True to trigger the handler on other side if allowing
@@ -975,8 +1036,176 @@ class SingletonUpdater:
         self._update_ready = False
         return 0
 
-    def deep_merge_directory(self, base, merger, clean=False):
-        """Merge folder 'merger' into 'base' without deleting existing"""
+    def extract_zip_files(self, targets):
+        """Extract members of the source zip, targets maps paths to zip infos.
+
+        Members are streamed to disk in chunks of FILE_CHUNK_SIZE, memory use
+        does not depend on the size of the files. Extraction runs in
+        EXTRACT_WORKERS threads, each reading through its own ZipFile, as
+        decompression and writes release the GIL. The first error is raised,
+        the remaining members are then not extracted.
+        """
+        stop = threading.Event()
+        local = threading.local()
+        zfiles = []
+        zfiles_lock = threading.Lock()
+
+        def extract(target, info):
+            if stop.is_set():
+                return
+            try:
+                zfile = getattr(local, "zfile", None)
+                if zfile is None:
+                    zfile = zipfile.ZipFile(self._source_zip, "r")
+                    local.zfile = zfile
+                    with zfiles_lock:
+                        zfiles.append(zfile)
+                with zfile.open(info) as source, open(target, "wb") as outfile:
+                    shutil.copyfileobj(source, outfile, FILE_CHUNK_SIZE)
+            except BaseException:
+                stop.set()
+                raise
+            self.print_verbose("Extract - create: " + target)
+
+        try:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=EXTRACT_WORKERS) as executor:
+                futures = [
+                    executor.submit(extract, target, info) for target, info in targets.items()
+                ]
+                for future in concurrent.futures.as_completed(futures):
+                    error = future.exception()
+                    if error is not None:
+                        stop.set()
+                        for other in futures:
+                            other.cancel()
+                        raise error
+        finally:
+            for zfile in zfiles:
+                zfile.close()
+
+    def get_addon_prefix(self, sub_paths):
+        """Path of the addon folder in the zip, relative to the top folder"""
+        if "__init__.py" in sub_paths:
+            return ""
+        if self._subfolder_path:
+            return self._subfolder_path.replace("\\", "/").strip("/") + "/"
+        # Otherwise the first folder is expected to be the addon.
+        for sub_path in sub_paths:
+            if "/" in sub_path:
+                return sub_path[: sub_path.index("/") + 1]
+        return ""
+
+    def get_installed_file_path(self, rel_path):
+        """Path of a file of the installed addon, rel_path uses / separators"""
+        return os.path.normpath(os.path.join(self._addon_root, *rel_path.split("/")))
+
+    def get_installed_manifest_path(self):
+        return os.path.join(self._updater_path, "installed_manifest.json")
+
+    def load_installed_manifest(self):
+        """CRC, size and mtime of files written by the last update.
+
+        Lets unchanged files be detected without reading them, the file is
+        trusted only while its size and mtime are the same as recorded.
+        """
+        try:
+            with open(self.get_installed_manifest_path()) as data_file:
+                manifest = json.load(data_file)
+        except (OSError, ValueError):
+            return dict()
+        if not isinstance(manifest, dict):
+            return dict()
+        return manifest
+
+    def find_unchanged_files(self, addon_files):
+        """Relative paths of the update files identical to the installed ones.
+
+        Files are compared by the CRC32 stored in the zip, the installed ones
+        are only read if they are missing from the manifest or were modified
+        since the last update.
+        """
+        manifest = self.load_installed_manifest()
+        unchanged = set()
+        skipped_bytes = 0
+        for rel_path, info in addon_files.items():
+            path = self.get_installed_file_path(rel_path)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if not os.path.isfile(path) or stat.st_size != info.file_size:
+                continue
+
+            entry = manifest.get(rel_path, None)
+            if (
+                isinstance(entry, dict)
+                and entry.get("crc", None) == info.CRC
+                and entry.get("size", None) == info.file_size
+                and entry.get("mtime_ns", None) == stat.st_mtime_ns
+            ):
+                same = True
+            else:
+                same = self.get_file_crc(path) == info.CRC
+            if same:
+                unchanged.add(rel_path)
+                skipped_bytes += info.file_size
+
+        self.print_verbose(
+            "Delta update: {} of {} files unchanged, skipping {} bytes".format(
+                len(unchanged), len(addon_files), skipped_bytes
+            )
+        )
+        return unchanged
+
+    def get_file_crc(self, path):
+        """CRC32 of the file, same as stored for zip members, None if unreadable"""
+        crc = 0
+        try:
+            with open(path, "rb") as data_file:
+                while True:
+                    chunk = data_file.read(FILE_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    crc = zlib.crc32(chunk, crc)
+        except OSError:
+            self.print_trace()
+            return None
+        return crc
+
+    def save_installed_manifest(self, addon_files, unchanged, unpath):
+        """Record the files of the addon that are now the same as in the update.
+
+        Extracted files that were moved into the addon folder are gone from
+        unpath, the ones kept due to overwrite patterns are left out.
+        """
+        manifest = dict()
+        for rel_path, info in addon_files.items():
+            extracted_path = os.path.join(unpath, *rel_path.split("/"))
+            if rel_path not in unchanged and os.path.exists(extracted_path):
+                continue
+            try:
+                stat = os.stat(self.get_installed_file_path(rel_path))
+            except OSError:
+                continue
+            manifest[rel_path] = {
+                "crc": info.CRC,
+                "size": info.file_size,
+                "mtime_ns": stat.st_mtime_ns,
+            }
+
+        try:
+            with open(self.get_installed_manifest_path(), "w") as outf:
+                json.dump(manifest, outf)
+        except OSError:
+            print("Failed to save the installed files manifest")
+            self.print_trace()
+
+    def deep_merge_directory(self, base, merger, clean=False, keep_files=None):
+        """Merge folder 'merger' into 'base' without deleting existing.
+
+        Files in keep_files are not pre-removed, used for files unchanged by
+        a delta update, which are not in 'merger' at all.
+        """
         if not os.path.exists(base):
             self.print_verbose("Base path does not exist:" + str(base))
             return -1
@@ -1026,6 +1255,8 @@ class SingletonUpdater:
             # Prune ie skip updater folder.
             dirs[:] = [d for d in dirs if os.path.join(path, d) not in [self._updater_path]]
             for file in files:
+                if keep_files and os.path.normpath(os.path.join(path, file)) in keep_files:
+                    continue
                 for pattern in self.remove_pre_update_patterns:
                     if fnmatch.filter([file], pattern):
                         try:
@@ -1121,18 +1352,177 @@ class SingletonUpdater:
         self._error = None
         self._error_msg = None
 
-    def url_retrieve(self, url_file, filepath):
-        """Custom urlretrieve implementation"""
-        chunk = 1024 * 8
-        f = open(filepath, "wb")
-        while 1:
-            data = url_file.read(chunk)
-            if not data:
-                # print("done.")
+    def create_download_request(self, url):
+        request = urllib.request.Request(url)
+
+        # Setup private token if appropriate.
+        if self._engine.token is not None:
+            if self._engine.name == "gitlab":
+                request.add_header('PRIVATE-TOKEN', self._engine.token)
+            else:
+                self.print_verbose("Tokens not setup for selected engine yet")
+
+        # Always set user agent
+        request.add_header('User-Agent', "Python/" + str(platform.python_version()))
+        return request
+
+    def get_partial_download_paths(self):
+        """Paths of the partially downloaded file and of its metadata.
+
+        They are outside of the staging folder, which is cleared before each
+        download, so an interrupted download can be resumed by the next one.
+        """
+        part_path = os.path.join(self._updater_path, "update_download.part")
+        return part_path, part_path + ".json"
+
+    def download_resumable(self, url, filepath):
+        """Download url to filepath, resuming interrupted downloads.
+
+        The data is written to a .part file first. If the previous download
+        of the same url was interrupted, only the rest is requested with
+        a Range header. If-Range makes the server send the whole file again
+        if it changed meanwhile. Connection errors are retried.
+        """
+        part_path, meta_path = self.get_partial_download_paths()
+        validator = None
+        try:
+            with open(meta_path, "r") as meta_file:
+                meta = json.load(meta_file)
+            if meta.get("url") == url and os.path.isfile(part_path):
+                validator = meta.get("validator")
+        except (OSError, ValueError):
+            pass
+        if validator is None and os.path.isfile(part_path):
+            os.remove(part_path)
+
+        try:
+            context = ssl._create_unverified_context()
+        except:
+            context = None
+
+        attempt = 0
+        while True:
+            offset = os.path.getsize(part_path) if validator is not None else 0
+            request = self.create_download_request(url)
+            if offset > 0:
+                request.add_header("Range", "bytes={}-".format(offset))
+                request.add_header("If-Range", validator)
+            try:
+                if context:
+                    response = urllib.request.urlopen(request, context=context)
+                else:
+                    response = urllib.request.urlopen(request)
+                with response:
+                    validator = self._get_download_validator(response)
+                    with open(meta_path, "w") as meta_file:
+                        json.dump({"url": url, "validator": validator}, meta_file)
+                    self.url_retrieve(response, part_path, offset)
                 break
-            f.write(data)
-            # print("Read %s bytes" % len(data))
-        f.close()
+            except urllib.error.HTTPError as e:
+                if e.code == 416 and offset > 0:
+                    # The part file is not a prefix of the file, start over.
+                    self.print_verbose("Range not satisfiable, restarting download")
+                    os.remove(part_path)
+                    validator = None
+                    continue
+                raise
+            except (urllib.error.URLError, http.client.HTTPException, OSError) as e:
+                attempt += 1
+                if attempt > DOWNLOAD_RETRIES:
+                    raise
+                # Without a validator the download starts over.
+                self.print_verbose(
+                    "Download interrupted ({}), {}, attempt {}/{}".format(
+                        e, "resuming" if validator is not None else "restarting",
+                        attempt, DOWNLOAD_RETRIES))
+                time.sleep(self.get_download_retry_delay(attempt))
+
+        os.replace(part_path, filepath)
+        os.remove(meta_path)
+
+    def get_download_retry_delay(self, attempt):
+        """Seconds to wait before the given retry of a download."""
+        delay = DOWNLOAD_RETRY_DELAY * attempt
+        if threading.current_thread() is threading.main_thread():
+            delay = min(delay, DOWNLOAD_MAX_MAIN_THREAD_RETRY_DELAY)
+        return delay
+
+    def _get_download_validator(self, response):
+        """Value for If-Range, None if the download can't be resumed."""
+        if response.headers.get("Accept-Ranges", "none").lower() == "none" \
+                and response.status != 206:
+            return None
+        etag = response.headers.get("ETag")
+        # Weak ETags can't be used with If-Range.
+        if etag is not None and not etag.startswith("W/"):
+            return etag
+        return response.headers.get("Last-Modified")
+
+    def url_retrieve(self, url_file, filepath, offset=0):
+        """Custom urlretrieve implementation.
+
+        Appends to filepath if the response is the requested range starting
+        at offset, overwrites it otherwise. The chunk size adapts to the
+        connection speed. Reports progress, see download_progress.
+        """
+        content_range = url_file.headers.get("Content-Range")
+        if getattr(url_file, "status", 200) == 206 and content_range is not None \
+                and content_range.startswith("bytes {}-".format(offset)):
+            mode = "ab"
+            total = content_range.rpartition("/")[2]
+            total = int(total) if total.isdigit() else None
+        else:
+            offset = 0
+            mode = "wb"
+            length = url_file.headers.get("Content-Length")
+            total = int(length) if length is not None and length.isdigit() else None
+
+        wm = None
+        if threading.current_thread() is threading.main_thread():
+            # Only the main thread may touch the UI.
+            wm = getattr(bpy.context, "window_manager", None)
+        if wm is not None:
+            wm.progress_begin(0, 100)
+
+        downloaded = offset
+        start_time = time.perf_counter()
+        self.download_speed = 0.0
+        self.download_progress = downloaded / total if total else None
+        chunk = DOWNLOAD_MIN_CHUNK
+        try:
+            with open(filepath, mode) as f:
+                while True:
+                    read_start = time.perf_counter()
+                    data = url_file.read(chunk)
+                    read_time = time.perf_counter() - read_start
+                    if not data:
+                        break
+                    f.write(data)
+                    downloaded += len(data)
+
+                    if read_time < DOWNLOAD_CHUNK_TARGET_TIME / 2:
+                        chunk = min(chunk * 2, DOWNLOAD_MAX_CHUNK)
+                    elif read_time > DOWNLOAD_CHUNK_TARGET_TIME * 2:
+                        chunk = max(chunk // 2, DOWNLOAD_MIN_CHUNK)
+
+                    elapsed = time.perf_counter() - start_time
+                    if elapsed > 0:
+                        self.download_speed = (downloaded - offset) / elapsed
+                    if total:
+                        self.download_progress = min(1.0, downloaded / total)
+                        if wm is not None:
+                            wm.progress_update(int(self.download_progress * 100))
+                    if self.download_progress_callback is not None:
+                        self.download_progress_callback(
+                            downloaded, total, self.download_speed)
+        finally:
+            if wm is not None:
+                wm.progress_end()
+
+        if total is not None and downloaded < total:
+            raise http.client.IncompleteRead(b"", total - downloaded)
+        self.print_verbose("Downloaded {} bytes, {:.1f} KB/s".format(
+            downloaded - offset, self.download_speed / 1024))
 
     def version_tuple_from_text(self, text):
         """Convert text into a tuple of numbers (int).
@@ -1541,6 +1931,11 @@ class SingletonUpdater:
         if self._async_checking:
             return
         self.print_verbose("Starting background checking thread")
+        # polib submodules can be lazily imported only on the main thread,
+        # the thread uses the HTTP session in request_api.
+        from . import polib
+        polib.import_submodules("http_session")
+
         check_thread = threading.Thread(
             target=self.async_check_update,
             args=(
@@ -1433,6 +1433,12 @@ def register(bl_info):
     # will ensure no old python files/caches remain in event different addon
     # versions have different filenames or structures.
 
+    # Only replace files which differ from the installed ones, unchanged
+    # files are detected by the CRC32 stored in the update zip. Installed
+    # files are read only if they changed since the last update. Ignored if
+    # clean=True in the run_update method.
+    updater.delta_update = True
+
     # Allow branches like 'master' as an option to update to, regardless
     # of release or version.
     # Default behavior: releases will still be used for auto check (popup),
@@ -0,0 +1,123 @@
+#!/usr/bin/python3
+# copyright (c) 2018- polygoniq xyz s.r.o.
+
+"""Measures per-call latency of the polygoniq root logger with direct and with queued handlers.
+
+Both setups use the same handlers as the addon - a console stream handler (writing to devnull
+here) and an hourly rotating file handler in a temporary directory. The queued setup is the one
+from logging_setup, the reported latency is what the logging thread pays per logger call.
+
+Usage:
+    python benchmarks/logging_benchmark.py --calls 20000
+"""
+
+import argparse
+import importlib.util
+import logging
+import logging.handlers
+import os
+import statistics
+import tempfile
+import time
+import typing
+
+
+ADDON_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+
+
+def load_logging_setup():
+    # The addon package itself needs bpy, logging_setup doesn't
+    spec = importlib.util.spec_from_file_location(
+        "logging_setup", os.path.join(ADDON_DIR, "logging_setup.py")
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def create_logger(name: str, log_dir: str, devnull: typing.TextIO) -> logging.Logger:
+    formatter = logging.Formatter(
+        "P%(process)d:%(asctime)s:%(name)s:%(levelname)s: [%(filename)s:%(lineno)d] %(message)s",
+        "%H:%M:%S",
+    )
+    logger = logging.getLogger(name)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    stream_handler = logging.StreamHandler(devnull)
+    stream_handler.setFormatter(formatter)
+    logger.addHandler(stream_handler)
+    file_handler = logging.handlers.TimedRotatingFileHandler(
+        os.path.join(log_dir, f"{name}.txt"), when="h", interval=1, backupCount=2, utc=True
+    )
+    file_handler.setFormatter(formatter)
+    logger.addHandler(file_handler)
+    return logger
+
+
+def measure(logger: logging.Logger, calls: int, with_exception: bool) -> typing.List[float]:
+    latencies = []
+    for i in range(calls):
+        start = time.perf_counter()
+        if with_exception:
+            try:
+                raise RuntimeError(f"Benchmark exception {i}")
+            except RuntimeError:
+                logger.exception("Uncaught exception raised in benchmark")
+        else:
+            logger.info(f"ExampleOperator operator execute finished in {i / 1000:.3f} seconds")
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def summarize(latencies: typing.List[float]) -> typing.Dict[str, float]:
+    ordered = sorted(latencies)
+    return {
+        "mean": statistics.mean(ordered) * 1e6,
+        "p50": ordered[len(ordered) // 2] * 1e6,
+        "p99": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1e6,
+        "max": ordered[-1] * 1e6,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--calls", type=int, default=10000, help="Logger calls per case")
+    args = parser.parse_args()
+
+    logging_setup = load_logging_setup()
+    results = {}
+    with tempfile.TemporaryDirectory() as log_dir, open(os.devnull, "w") as devnull:
+        for with_exception in [False, True]:
+            kind = "exception" if with_exception else "info"
+            calls = args.calls // 10 if with_exception else args.calls
+
+            direct = create_logger(f"direct_{kind}", log_dir, devnull)
+            results[f"direct {kind}"] = summarize(measure(direct, calls, with_exception))
+
+            queued = create_logger(f"queued_{kind}", log_dir, devnull)
+            logging_setup.acquire_root_logger(queued)
+            results[f"queued {kind}"] = summarize(measure(queued, calls, with_exception))
+            # Waits until the listener handles everything
+            drain_start = time.perf_counter()
+            logging_setup.release_root_logger(queued)
+            drain = time.perf_counter() - drain_start
+            print(f"listener drained the remaining {kind} records in {drain * 1000:.1f} ms")
+
+            for logger in [direct, queued]:
+                for handler in list(logger.handlers):
+                    logger.removeHandler(handler)
+                    handler.close()
+
+    print(f"{'case':<20}{'mean [us]':>12}{'p50 [us]':>12}{'p99 [us]':>12}{'max [us]':>12}")
+    for case, result in results.items():
+        print(
+            f"{case:<20}{result['mean']:>12.2f}{result['p50']:>12.2f}{result['p99']:>12.2f}"
+            f"{result['max']:>12.2f}"
+        )
+    for kind in ["info", "exception"]:
+        speedup = results[f"direct {kind}"]["mean"] / results[f"queued {kind}"]["mean"]
+        print(f"queued {kind} calls are {speedup:.2f}x faster for the logging thread")
+
+
+if __name__ == "__main__":
+    main()
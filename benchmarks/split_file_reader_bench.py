@@ -0,0 +1,309 @@
+#!/usr/bin/python3
+# copyright (c) 2018- polygoniq xyz s.r.o.
+
+"""Benchmark suite of SplitFileReader on synthetic zip archives split into parts.
+
+For each configuration of part count and part size measures sequential read and readinto throughput, random seek
+latency, seek to the end and ZipFile open time in each mode of SplitFileReader - scanning, index, mmap and prefetch.
+The same data in a single contiguous file read by the built-in open() is the baseline. Then measures the throughput
+of extract_split_zip on a compressed archive for different numbers of workers.
+
+Doesn't need Blender, split_file_reader doesn't depend on bpy nor on the rest of polib. Results can be saved as JSON
+and compared with results of a previous run, cases slower than the threshold are reported as regressions and the
+script exits with 1.
+
+Usage:
+    python benchmarks/split_file_reader_bench.py --configs 10x4194304,1000x65536 --output before.json
+    python benchmarks/split_file_reader_bench.py --configs 10x4194304,1000x65536 --compare before.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import typing
+import zipfile
+
+
+ADDON_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+# split_file_reader doesn't depend on bpy nor on the rest of polib
+sys.path.insert(0, os.path.join(ADDON_DIR, "python_deps", "polib"))
+import split_file_reader  # noqa: E402
+
+
+# Keyword arguments of SplitFileReader for each compared mode, None is the contiguous file baseline
+MODES: typing.Dict[str, typing.Optional[typing.Dict[str, typing.Any]]] = {
+    "file": None,
+    "scan": {},
+    "index": {"use_index": True},
+    "mmap": {"use_mmap": True},
+    "prefetch": {"prefetch_blocks": 4},
+}
+
+# Part count x part size, roughly 40 MB each, from few big parts to many small ones
+DEFAULT_CONFIGS = "10x4194304,100x419430,1000x41943"
+
+READ_CHUNK_SIZE = 1024 * 1024
+
+
+class Result(typing.NamedTuple):
+    value: float
+    unit: str
+    higher_is_better: bool
+
+
+def split_file(archive_path: str, part_size: int) -> typing.List[str]:
+    """Splits 'archive_path' into parts of 'part_size' bytes, keeps the original as the baseline"""
+    directory = os.path.dirname(archive_path)
+    paths = []
+    with open(archive_path, "rb") as f:
+        i = 0
+        while True:
+            data = f.read(part_size)
+            if len(data) == 0:
+                break
+            path = os.path.join(directory, f"{os.path.basename(archive_path)}.{i:04d}")
+            with open(path, "wb") as part:
+                part.write(data)
+            paths.append(path)
+            i += 1
+    return paths
+
+
+def create_split_archive(directory: str, parts: int, part_size: int) -> typing.List[str]:
+    """Creates a zip with incompressible members and splits it into 'parts' files"""
+    archive_path = os.path.join(directory, "archive.zip")
+    member_size = max(1, part_size // 4)
+    with zipfile.ZipFile(archive_path, "w", compression=zipfile.ZIP_STORED) as archive:
+        for i in range(parts * part_size // member_size):
+            archive.writestr(f"member_{i:06d}.bin", os.urandom(member_size))
+    return split_file(archive_path, part_size)
+
+
+def create_compressed_split_archive(
+    directory: str, members: int, member_size: int, part_size: int
+) -> typing.List[str]:
+    """Creates a zip with deflated, roughly 4:1 compressible members, resembling textures and blends"""
+    archive_path = os.path.join(directory, "compressed.zip")
+    rng = random.Random(0)
+    with zipfile.ZipFile(archive_path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for i in range(members):
+            data = bytearray()
+            while len(data) < member_size:
+                data += os.urandom(64) * rng.randint(2, 8)
+            archive.writestr(f"textures/member_{i:06d}.bin", bytes(data[:member_size]))
+    paths = split_file(archive_path, part_size)
+    os.remove(archive_path)
+    return paths
+
+
+def median_time(function: typing.Callable[[], typing.Any], repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def open_reader(
+    paths: typing.List[str], baseline_path: str, mode: typing.Optional[typing.Dict[str, typing.Any]]
+) -> typing.BinaryIO:
+    if mode is None:
+        return open(baseline_path, "rb")
+    return split_file_reader.SplitFileReader(paths, **mode)
+
+
+def bench_sequential_read(reader: typing.BinaryIO) -> None:
+    while len(reader.read(READ_CHUNK_SIZE)) > 0:
+        pass
+
+
+def bench_sequential_readinto(reader: typing.BinaryIO) -> None:
+    buffer = bytearray(READ_CHUNK_SIZE)
+    while reader.readinto(buffer) > 0:
+        pass
+
+
+def bench_random_seeks(reader: typing.BinaryIO, total_size: int, seeks: int) -> None:
+    rng = random.Random(0)
+    for _ in range(seeks):
+        reader.seek(rng.randrange(total_size), 0)
+        reader.read(64)
+
+
+def bench_seek_end(reader: typing.BinaryIO) -> None:
+    reader.seek(0, 2)
+
+
+def bench_zipfile_open(reader: typing.BinaryIO) -> None:
+    with zipfile.ZipFile(reader) as archive:
+        archive.namelist()
+
+
+def bench_extract(paths: typing.List[str], destination: str, workers: int) -> None:
+    shutil.rmtree(destination, ignore_errors=True)
+    split_file_reader.extract_split_zip(paths, destination, workers=workers)
+
+
+def run_config(
+    directory: str, parts: int, part_size: int, args: argparse.Namespace
+) -> typing.Dict[str, Result]:
+    config_dir = os.path.join(directory, f"{parts}x{part_size}")
+    os.makedirs(config_dir)
+    paths = create_split_archive(config_dir, parts, part_size)
+    baseline_path = os.path.join(config_dir, "archive.zip")
+    total_size = os.path.getsize(baseline_path)
+    total_mb = total_size / (1024 * 1024)
+
+    # Case name -> (function of an open reader, converts the median time to the result)
+    cases: typing.Dict[
+        str, typing.Tuple[typing.Callable[[typing.BinaryIO], None], typing.Callable[[float], Result]]
+    ] = {
+        "sequential read": (bench_sequential_read, lambda t: Result(total_mb / t, "MB/s", True)),
+        "sequential readinto": (
+            bench_sequential_readinto,
+            lambda t: Result(total_mb / t, "MB/s", True),
+        ),
+        "random seek + read(64)": (
+            lambda reader: bench_random_seeks(reader, total_size, args.seeks),
+            lambda t: Result(t / args.seeks * 1e6, "us", False),
+        ),
+        "seek(0, 2)": (bench_seek_end, lambda t: Result(t * 1000, "ms", False)),
+        "ZipFile open": (bench_zipfile_open, lambda t: Result(t * 1000, "ms", False)),
+    }
+
+    results = {}
+    for case_name, (function, to_result) in cases.items():
+        for mode_name, mode in MODES.items():
+
+            def sample() -> None:
+                # Opening the reader is part of the measurement, in the index mode it measures all parts
+                with open_reader(paths, baseline_path, mode) as reader:
+                    function(reader)
+
+            duration = median_time(sample, args.repeat)
+            results[f"{parts}x{part_size}/{case_name}/{mode_name}"] = to_result(duration)
+    return results
+
+
+def run_extraction(directory: str, args: argparse.Namespace) -> typing.Dict[str, Result]:
+    paths = create_compressed_split_archive(directory, args.members, args.member_size, 1024 * 1024)
+    destination = os.path.join(directory, "extracted")
+    total_mb = args.members * args.member_size / (1024 * 1024)
+    results = {}
+    for workers in [int(workers) for workers in args.workers.split(",")]:
+        duration = median_time(lambda: bench_extract(paths, destination, workers), args.repeat)
+        results[f"extract/{args.members}x{args.member_size}/{workers} workers"] = Result(
+            total_mb / duration, "MB/s", True
+        )
+    shutil.rmtree(destination, ignore_errors=True)
+    return results
+
+
+def print_results(results: typing.Dict[str, Result]) -> None:
+    width = max(len(key) for key in results)
+    for key, result in results.items():
+        print(f"{key:<{width}}  {result.value:>12.2f} {result.unit}")
+
+
+def compare_results(
+    results: typing.Dict[str, Result],
+    previous: typing.Dict[str, typing.Dict[str, typing.Any]],
+    threshold: float,
+) -> typing.List[str]:
+    """Prints the change of each case against 'previous', returns cases worse by more than 'threshold' percent"""
+    regressions = []
+    width = max(len(key) for key in results)
+    print(f"\n{'case':<{width}}  {'previous':>12}  {'current':>12}  {'change':>8}")
+    for key, result in results.items():
+        previous_result = previous.get(key, None)
+        if previous_result is None or previous_result["value"] == 0:
+            print(f"{key:<{width}}  {'-':>12}  {result.value:>12.2f}  {'new':>8}")
+            continue
+
+        change = (result.value - previous_result["value"]) / previous_result["value"] * 100.0
+        worse_by = -change if result.higher_is_better else change
+        mark = ""
+        if worse_by > threshold:
+            regressions.append(key)
+            mark = "  REGRESSION"
+        print(
+            f"{key:<{width}}  {previous_result['value']:>12.2f}  {result.value:>12.2f}  "
+            f"{change:>+7.1f}%{mark}"
+        )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument(
+        "--configs",
+        default=DEFAULT_CONFIGS,
+        help="Comma separated PARTSxPART_SIZE configurations of the split archives",
+    )
+    parser.add_argument("--seeks", type=int, default=200, help="Random seeks per sample")
+    parser.add_argument("--repeat", type=int, default=5, help="Samples per case")
+    parser.add_argument(
+        "--workers", default="1,2,4,8", help="Comma separated worker counts for extraction"
+    )
+    parser.add_argument("--members", type=int, default=32, help="Members of extracted archive")
+    parser.add_argument(
+        "--member-size", type=int, default=2 * 1024 * 1024, help="Size of each extracted member"
+    )
+    parser.add_argument("--output", help="Path of a JSON file to write the results to")
+    parser.add_argument("--compare", help="Path of a JSON file with results of a previous run")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=10.0,
+        help="Percentage by which a case has to be worse than in --compare to be a regression",
+    )
+    args = parser.parse_args()
+
+    configs = []
+    for config in args.configs.split(","):
+        parts, part_size = config.lower().split("x")
+        configs.append((int(parts), int(part_size)))
+
+    results: typing.Dict[str, Result] = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for parts, part_size in configs:
+            print(f"benchmarking {parts} parts of {part_size} bytes", file=sys.stderr)
+            results.update(run_config(directory, parts, part_size, args))
+        print(f"benchmarking extraction with {args.workers} workers", file=sys.stderr)
+        results.update(run_extraction(directory, args))
+
+    print_results(results)
+
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(
+                {
+                    "python": sys.version,
+                    "platform": platform.platform(),
+                    "cpu_count": os.cpu_count(),
+                    "args": vars(args),
+                    "results": {key: result._asdict() for key, result in results.items()},
+                },
+                f,
+                indent=4,
+            )
+
+    if args.compare is not None:
+        with open(args.compare) as f:
+            previous = json.load(f)["results"]
+        regressions = compare_results(results, previous, args.threshold)
+        if len(regressions) > 0:
+            print(f"\n{len(regressions)} regressions over {args.threshold}%")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/python3
+# copyright (c) 2018- polygoniq xyz s.r.o.
+
+"""Compares time-to-register() of blenderkitty with eagerly and lazily imported polib submodules.
+
+Every sample starts a fresh Blender process, imports the addon package and calls its register().
+Eager imports are forced by the POLYGONIQ_POLIB_EAGER_IMPORT environment variable.
+
+Usage:
+    python benchmarks/startup_benchmark.py --blender /path/to/blender --samples 10
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import typing
+
+
+ADDON_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+
+# Runs inside Blender, prints a single JSON line with the measured times
+BLENDER_SCRIPT = """
+import importlib
+import json
+import sys
+import time
+
+sys.path.insert(0, {addon_parent!r})
+start = time.perf_counter()
+addon = importlib.import_module({addon_name!r})
+imported = time.perf_counter()
+addon.register()
+registered = time.perf_counter()
+print("STARTUP_BENCHMARK " + json.dumps(
+    {{"import": imported - start, "register": registered - imported, "total": registered - start}}
+))
+addon.unregister()
+"""
+
+
+def run_sample(blender: str, eager: bool) -> typing.Dict[str, float]:
+    env = dict(os.environ)
+    env["POLYGONIQ_POLIB_EAGER_IMPORT"] = "1" if eager else "0"
+    script = BLENDER_SCRIPT.format(
+        addon_parent=os.path.dirname(ADDON_DIR), addon_name=os.path.basename(ADDON_DIR)
+    )
+    output = subprocess.run(
+        [blender, "--factory-startup", "--background", "--python-expr", script],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    for line in output.splitlines():
+        if line.startswith("STARTUP_BENCHMARK "):
+            return json.loads(line[len("STARTUP_BENCHMARK ") :])
+    raise RuntimeError(f"Blender didn't report startup times, output:\n{output}")
+
+
+def summarize(samples: typing.List[typing.Dict[str, float]]) -> typing.Dict[str, float]:
+    return {key: statistics.median(sample[key] for sample in samples) for key in samples[0]}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--blender", default="blender", help="Path to the Blender executable")
+    parser.add_argument("--samples", type=int, default=5, help="Blender runs per mode")
+    args = parser.parse_args()
+
+    results = {}
+    for mode, eager in [("eager", True), ("lazy", False)]:
+        samples = [run_sample(args.blender, eager) for _ in range(args.samples)]
+        results[mode] = summarize(samples)
+
+    print(f"{'mode':<8}{'import [ms]':>14}{'register [ms]':>16}{'total [ms]':>14}")
+    for mode, result in results.items():
+        print(
+            f"{mode:<8}{result['import'] * 1000:>14.1f}{result['register'] * 1000:>16.1f}"
+            f"{result['total'] * 1000:>14.1f}"
+        )
+    speedup = results["eager"]["total"] / results["lazy"]["total"]
+    print(f"lazy polib imports are {speedup:.2f}x faster to register()")
+
+
+if __name__ == "__main__":
+    main()
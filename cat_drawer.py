@@ -12,6 +12,7 @@ import typing
 import random
 
 from . import preferences
+from . import polib
 
 
 MODULE_CLASSES: typing.List[typing.Any] = []
@@ -85,17 +86,24 @@ class PNGSequencePlayer:
         self.total_frames = 0
         self.texture_width = 0
         self.texture_height = 0
+        self._timer: typing.Optional[typing.Callable[[], float]] = None
         self._load_as_textures()
 
     def __del__(self):
-        if bpy.app.timers.is_registered(self._tick):
-            bpy.app.timers.unregister(self._tick)
+        self.stop_play()
 
     def start_play(self):
         if self.total_frames == 0:
             raise RuntimeError("No frames loaded, can't play!")
 
-        bpy.app.timers.register(self._tick, persistent=True)
+        self._timer = polib.timers_bpy.TIMER_REGISTRY.register(
+            __name__, self._tick, persistent=True, name="PNGSequencePlayer._tick"
+        )
+
+    def stop_play(self):
+        if self._timer is not None:
+            polib.timers_bpy.TIMER_REGISTRY.unregister(self._timer)
+            self._timer = None
 
     def get_current_texture(self) -> typing.Optional[gpu.types.GPUTexture]:
         if self.current_index < len(self.textures):
@@ -159,6 +167,8 @@ class Cat:
         if self.player is None:
             raise RuntimeError("Cat is already asleep!")
 
+        # The timer holds a reference to the player, it would keep playing forever otherwise
+        self.player.stop_play()
         del self.player
 
     @abc.abstractmethod
@@ -341,14 +351,20 @@ class DrawerFullOfCats:
         self.available_cats = [HappyCat, SpinningCat, DancingCat, PopCat, GooglyCat, HangingCat]
         self.cats = []
         self.tick_rate = tick_rate
-        bpy.app.timers.register(self.tick, persistent=True, first_interval=0.0)
+        polib.timers_bpy.TIMER_REGISTRY.register(
+            __name__, self.tick, first_interval=0.0, persistent=True
+        )
 
     def open(self, context: bpy.types.Context) -> Cat:
         cat = self.available_cats[random.randint(0, len(self.available_cats) - 1)]()
         cat.play(context)
         self.cats.append(cat)
-        bpy.app.timers.register(
-            lambda: self.close(cat), persistent=True, first_interval=cat.duration
+        polib.timers_bpy.TIMER_REGISTRY.register(
+            __name__,
+            lambda: self.close(cat),
+            first_interval=cat.duration,
+            persistent=True,
+            name="DrawerFullOfCats.close",
         )
         return cat
 
@@ -366,8 +382,10 @@ class DrawerFullOfCats:
 
         gpu.state.blend_set(blend)
 
-        # Force redraw of 3D viewport (has to be out of loop)
-        bpy.app.timers.register(_tag_redraw_view_3d, persistent=True, first_interval=0.0)
+        # Force redraw of 3D viewport (has to be out of loop). This runs every frame, the one-shot
+        # timer goes directly to bpy.app.timers, not through the registry that keeps stats per timer.
+        if not bpy.app.timers.is_registered(_tag_redraw_view_3d):
+            bpy.app.timers.register(_tag_redraw_view_3d, first_interval=0.0, persistent=True)
 
     def tick(self):
         for cat in self.cats:
@@ -422,7 +440,9 @@ class OpenCatDrawer(bpy.types.Operator):
     def open(cls, context: bpy.types.Context, index: int):
         cat = CAT_DRAWER.open(context)
         cls.index_state_map[index] = f"Got: {cat.type.capitalize()} {cat.name}!"
-        bpy.app.timers.register(lambda: cls.finish(index), first_interval=3.0)
+        polib.timers_bpy.TIMER_REGISTRY.register(
+            __name__, lambda: cls.finish(index), first_interval=3.0, name="OpenCatDrawer.finish"
+        )
 
     @classmethod
     def finish(cls, index: int):
@@ -440,18 +460,19 @@ class OpenCatDrawer(bpy.types.Operator):
         prefs = preferences.get_preferences(context)
         prefs.play_sound(os.path.join(prefs.sounds_path, "drawer.ogg"), stop_after=opening_time)
 
-        bpy.app.timers.register(
-            lambda: OpenCatDrawer.open(context, self.index), first_interval=opening_time
-        )
-        bpy.app.timers.register(
-            lambda: OpenCatDrawer.add_dot(self.index), first_interval=opening_time * 0.2
-        )
-        bpy.app.timers.register(
-            lambda: OpenCatDrawer.add_dot(self.index), first_interval=opening_time * 0.4
-        )
-        bpy.app.timers.register(
-            lambda: OpenCatDrawer.add_dot(self.index), first_interval=opening_time * 0.8
+        polib.timers_bpy.TIMER_REGISTRY.register(
+            __name__,
+            lambda: OpenCatDrawer.open(context, self.index),
+            first_interval=opening_time,
+            name="OpenCatDrawer.open",
         )
+        for fraction in [0.2, 0.4, 0.8]:
+            polib.timers_bpy.TIMER_REGISTRY.register(
+                __name__,
+                lambda: OpenCatDrawer.add_dot(self.index),
+                first_interval=opening_time * fraction,
+                name="OpenCatDrawer.add_dot",
+            )
         return {'FINISHED'}
 
     def invoke(self, context: bpy.types.Context, event: bpy.types.Event):
@@ -475,14 +496,23 @@ def register():
 
     global _DRAW_HANDLER
     _DRAW_HANDLER = bpy.types.SpaceView3D.draw_handler_add(
-        CAT_DRAWER.draw, (), 'WINDOW', 'POST_PIXEL'
+        polib.log_helpers_bpy.timed_draw_handler("DrawerFullOfCats.draw", CAT_DRAWER.draw),
+        (),
+        'WINDOW',
+        'POST_PIXEL',
     )
 
     # Start the update_global_tick_context, right after registering blenderkitty
-    bpy.app.timers.register(_start_gathering_events, first_interval=0.5, persistent=True)
+    polib.timers_bpy.TIMER_REGISTRY.register(
+        __name__, _start_gathering_events, first_interval=0.5, persistent=True
+    )
 
 
 def unregister():
+    polib.timers_bpy.TIMER_REGISTRY.unregister_owner(__name__)
+    if bpy.app.timers.is_registered(_tag_redraw_view_3d):
+        bpy.app.timers.unregister(_tag_redraw_view_3d)
+
     for cls in reversed(MODULE_CLASSES):
         bpy.utils.unregister_class(cls)
 
@@ -0,0 +1,85 @@
+# copyright (c) 2018- polygoniq xyz s.r.o.
+# Background handling of records of the "polygoniq" root logger
+
+# The root logger is shared by all polygoniq addons. Its console and file handlers are moved to
+# a listener thread, the logging thread - usually the Blender main thread - only enqueues records.
+# Each addon acquires the root logger in register and releases it in unregister, once there are no
+# users left the handlers are attached back to the root logger directly.
+#
+# This module can't use polib or bpy, logging is set up before the dependencies are imported.
+
+import atexit
+import copy
+import logging
+import logging.handlers
+import queue
+
+
+class RecordQueueHandler(logging.handlers.QueueHandler):
+    """Enqueues records without formatting them, the listener's handlers format them"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The default implementation formats the whole record including the exception and drops
+        # exc_info. We only merge the args, they could change before the listener handles them.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def acquire_root_logger(root_logger: logging.Logger) -> None:
+    """Registers a user of 'root_logger', the first user moves its handlers to a listener thread"""
+    users = getattr(root_logger, "polygoniq_log_users", 0)
+    if users == 0 and getattr(root_logger, "polygoniq_log_listener", None) is None:
+        handlers = list(root_logger.handlers)
+        record_queue = queue.SimpleQueue()
+        queue_handler = RecordQueueHandler(record_queue)
+        listener = logging.handlers.QueueListener(
+            record_queue, *handlers, respect_handler_level=True
+        )
+        for handler in handlers:
+            root_logger.removeHandler(handler)
+        root_logger.addHandler(queue_handler)
+        listener.start()
+        setattr(root_logger, "polygoniq_log_listener", listener)
+        setattr(root_logger, "polygoniq_log_queue_handler", queue_handler)
+
+        if not getattr(root_logger, "polygoniq_log_atexit_registered", False):
+            # The listener thread is a daemon, records still in the queue would be lost on exit
+            atexit.register(_stop_listener_at_exit, root_logger)
+            setattr(root_logger, "polygoniq_log_atexit_registered", True)
+
+    setattr(root_logger, "polygoniq_log_users", users + 1)
+
+
+def release_root_logger(root_logger: logging.Logger) -> None:
+    """Unregisters a user of 'root_logger', the last user attaches the handlers back directly"""
+    users = getattr(root_logger, "polygoniq_log_users", 0)
+    if users == 0:
+        return
+
+    users -= 1
+    setattr(root_logger, "polygoniq_log_users", users)
+    if users > 0:
+        return
+
+    _detach_listener(root_logger)
+
+
+def _detach_listener(root_logger: logging.Logger) -> None:
+    listener = getattr(root_logger, "polygoniq_log_listener", None)
+    if listener is None:
+        return
+
+    root_logger.removeHandler(getattr(root_logger, "polygoniq_log_queue_handler"))
+    for handler in listener.handlers:
+        root_logger.addHandler(handler)
+    # Handles all records enqueued so far and joins the thread
+    listener.stop()
+    setattr(root_logger, "polygoniq_log_listener", None)
+    setattr(root_logger, "polygoniq_log_queue_handler", None)
+
+
+def _stop_listener_at_exit(root_logger: logging.Logger) -> None:
+    setattr(root_logger, "polygoniq_log_users", 0)
+    _detach_listener(root_logger)
@@ -83,6 +83,13 @@ def get_cat_enum_items(image_path):
     return ret
 
 
+def update_slow_operator_profiling(self, context: bpy.types.Context) -> None:
+    if self.profile_slow_operators:
+        polib.metrics.SLOW_CALL_PROFILER.threshold = self.slow_operator_threshold / 1000.0
+    else:
+        polib.metrics.SLOW_CALL_PROFILER.threshold = None
+
+
 def get_cat_enum_items_context(context):
     prefs = get_preferences(context)
     return get_cat_enum_items(prefs.cats_path)
@@ -194,6 +201,22 @@ class Preferences(bpy.types.AddonPreferences):
         description="Maximal interval in seconds between cat image changes",
     )
 
+    profile_slow_operators: bpy.props.BoolProperty(
+        name="Profile Slow Operators",
+        default=False,
+        description="Save a cProfile capture of every operator call slower than the threshold "
+        "to the log directory. Slows down all operators, enable only when investigating issues",
+        update=update_slow_operator_profiling,
+    )
+
+    slow_operator_threshold: bpy.props.FloatProperty(
+        name="Threshold [ms]",
+        default=500.0,
+        min=1.0,
+        description="Operator calls slower than this are profiled",
+        update=update_slow_operator_profiling,
+    )
+
     sound_device: typing.Optional[aud.Device] = None
 
     def play_sound(
@@ -226,8 +249,11 @@ class Preferences(bpy.types.AddonPreferences):
             )
 
             if stop_after is not None:
-                bpy.app.timers.register(
-                    Preferences.sound_handle.stop, first_interval=stop_after, persistent=False
+                polib.timers_bpy.TIMER_REGISTRY.register(
+                    __name__,
+                    Preferences.sound_handle.stop,
+                    first_interval=stop_after,
+                    name="aud.Handle.stop",
                 )
 
         except aud.error:
@@ -280,6 +306,12 @@ class Preferences(bpy.types.AddonPreferences):
 
         row = self.layout.row()
         row.operator(PackLogs.bl_idname, icon='EXPERIMENTAL')
+        row.operator(ShowOperatorMetrics.bl_idname, icon='SORTTIME')
+        row = self.layout.row()
+        row.prop(self, "profile_slow_operators")
+        col = row.column()
+        col.enabled = self.profile_slow_operators
+        col.prop(self, "slow_operator_threshold")
 
         self.layout.separator()
         row = self.layout.row()
@@ -334,8 +366,57 @@ class PackLogs(bpy.types.Operator):
     bl_description = "Archives polygoniq logs as zip file and opens its location"
     bl_options = {'REGISTER'}
 
-    def execute(self, context):
-        packed_logs_directory_path = polib.log_helpers_bpy.pack_logs(telemetry)
+    compression_level: bpy.props.IntProperty(
+        name="Compression Level",
+        default=6,
+        min=0,
+        max=9,
+        description="Zip compression level, lower is faster, higher produces smaller archives",
+    )
+
+    max_size_mb: bpy.props.FloatProperty(
+        name="Max Size [MB]",
+        default=256.0,
+        min=1.0,
+        description="Maximum size of logs to pack, the oldest logs over the limit are skipped",
+    )
+
+    def execute(self, context: bpy.types.Context):
+        self._archiver = polib.log_helpers_bpy.start_pack_logs(
+            telemetry, self.compression_level, int(self.max_size_mb * 1024 * 1024)
+        )
+        wm = context.window_manager
+        self._timer = wm.event_timer_add(0.1, window=context.window)
+        wm.modal_handler_add(self)
+        wm.progress_begin(0, 100)
+        return {'RUNNING_MODAL'}
+
+    def _finish(self, context: bpy.types.Context) -> None:
+        wm = context.window_manager
+        wm.event_timer_remove(self._timer)
+        wm.progress_end()
+
+    def modal(self, context: bpy.types.Context, event: bpy.types.Event):
+        if event.type == 'ESC' and self._archiver.is_alive():
+            # The archiver removes the partial archive on its own once it stops
+            self._archiver.cancel()
+            self._finish(context)
+            self.report({'WARNING'}, "Packing logs was cancelled")
+            return {'CANCELLED'}
+        if event.type != 'TIMER':
+            return {'PASS_THROUGH'}
+
+        context.window_manager.progress_update(int(self._archiver.progress * 100))
+        if self._archiver.is_alive():
+            return {'PASS_THROUGH'}
+
+        self._finish(context)
+        if self._archiver.error is not None:
+            self.report({'ERROR'}, f"Failed to pack logs: {self._archiver.error}")
+            return {'CANCELLED'}
+
+        packed_logs_directory_path = os.path.dirname(self._archiver.archive_path)
+        self.report({'INFO'}, f"Logs packed to {packed_logs_directory_path}")
         polib.utils_bpy.xdg_open_file(packed_logs_directory_path)
         return {'FINISHED'}
 
@@ -343,6 +424,62 @@ class PackLogs(bpy.types.Operator):
 MODULE_CLASSES.append(PackLogs)
 
 
+@polib.log_helpers_bpy.logged_operator
+class ExportOperatorMetrics(bpy.types.Operator):
+    bl_idname = "blenderkitty.export_operator_metrics"
+    bl_label = "Export Operator Metrics"
+    bl_description = "Exports latencies of polygoniq operators as CSV to the log directory"
+    bl_options = {'REGISTER'}
+
+    def execute(self, context):
+        path = os.path.join(polib.metrics.LOG_DIR, "operator_metrics.csv")
+        polib.metrics.OPERATOR_METRICS.export_csv(path)
+        self.report({'INFO'}, f"Operator metrics exported to {path}")
+        return {'FINISHED'}
+
+
+MODULE_CLASSES.append(ExportOperatorMetrics)
+
+
+class ShowOperatorMetrics(bpy.types.Operator):
+    bl_idname = "blenderkitty.show_operator_metrics"
+    bl_label = "Operator Metrics"
+    bl_description = "Shows call counts and latencies of polygoniq operators in this session"
+    bl_options = {'REGISTER'}
+
+    def draw(self, context: bpy.types.Context):
+        summaries = polib.metrics.OPERATOR_METRICS.get_summaries()
+        if len(summaries) == 0:
+            self.layout.label(text="No operator was called yet")
+            return
+
+        col = self.layout.column(align=True)
+        headers = ["Count", "p50 [ms]", "p95 [ms]", "p99 [ms]", "Max [ms]"]
+        split = col.split(factor=0.4)
+        split.label(text="Operator")
+        row = split.row()
+        for header in headers:
+            row.label(text=header)
+        for summary in summaries:
+            split = col.split(factor=0.4)
+            split.label(text=summary["name"])
+            row = split.row()
+            row.label(text=str(summary["count"]))
+            for key in ["p50", "p95", "p99", "max"]:
+                row.label(text=f"{summary[key]:.1f}")
+
+        self.layout.operator(ExportOperatorMetrics.bl_idname, icon='EXPORT')
+
+    def invoke(self, context: bpy.types.Context, event: bpy.types.Event):
+        return context.window_manager.invoke_popup(self, width=700)
+
+    def execute(self, context: bpy.types.Context):
+        return {'FINISHED'}
+
+
+MODULE_CLASSES.append(ShowOperatorMetrics)
+
+
 def get_preferences(context: bpy.types.Context) -> Preferences:
     return context.preferences.addons[__package__].preferences
 
@@ -351,8 +488,19 @@ def register():
     for cls in MODULE_CLASSES:
         bpy.utils.register_class(cls)
 
+    # Profiling settings are stored in preferences, the profiler has to be configured again.
+    # The context is restricted in register and the addon isn't in preferences yet when it's
+    # enabled for the first time, the profiler stays off then, the property updates cover the rest.
+    preferences = getattr(bpy.context, "preferences", None)
+    addon = preferences.addons.get(__package__, None) if preferences is not None else None
+    if addon is not None:
+        update_slow_operator_profiling(addon.preferences, bpy.context)
+
 
 def unregister():
+    polib.metrics.SLOW_CALL_PROFILER.threshold = None
+    polib.timers_bpy.TIMER_REGISTRY.unregister_owner(__name__)
+
     for cls in reversed(MODULE_CLASSES):
         bpy.utils.unregister_class(cls)
 
@@ -1,12 +1,51 @@
 #!/usr/bin/python3
 # copyright (c) 2018- polygoniq xyz s.r.o.
 
+import importlib
+import importlib.util
 import logging
+import os
+import sys
+import threading
+import types
+import typing
 
 logger = logging.getLogger(f"polygoniq.{__name__}")
 
 
-if "asset_pack_bpy" not in locals():
+# Submodules are imported on first attribute access, see '__getattr__'. Most addons use only
+# a handful of them and some are expensive to import - they import numpy or compile GPU shaders.
+LAZY_SUBMODULES = {
+    "asset_pack_bpy",
+    "color_utils",
+    "geonodes_mod_utils_bpy",
+    "http_session",
+    "installation_utils_bpy",
+    "linalg_bpy",
+    "log_helpers_bpy",
+    "material_utils_bpy",
+    "metrics",
+    "module_install_utils_bpy",
+    "node_utils_bpy",
+    "preview_manager_bpy",
+    "remove_duplicates_bpy",
+    "render_bpy",
+    "rigs_shared_bpy",
+    "snap_to_ground_bpy",
+    "spline_utils_bpy",
+    "split_file_reader",
+    "timers_bpy",
+    "ui_bpy",
+    "utils_bpy",
+}
+
+# Set to 1 to import all submodules right away, useful for debugging and for startup benchmarks
+EAGER_IMPORT = os.environ.get("POLYGONIQ_POLIB_EAGER_IMPORT", "0") == "1"
+
+_LAZY_IMPORT_LOCK = threading.RLock()
+
+
+if "telemetry_native_module" not in locals():
     from . import asset_pack
     from . import bl_info_utils
 
@@ -14,28 +53,9 @@ if "asset_pack_bpy" not in locals():
     # a usecase where bpy is not available and can't be imported
     try:
         import bpy
-        from . import asset_pack_bpy
-        from . import color_utils
-        from . import geonodes_mod_utils_bpy
-        from . import installation_utils_bpy
-        from . import linalg_bpy
-        from . import log_helpers_bpy
-        from . import material_utils_bpy
-        from . import module_install_utils_bpy
-        from . import node_utils_bpy
-        from . import preview_manager_bpy
-        from . import remove_duplicates_bpy
-        from . import render_bpy
-        from . import rigs_shared_bpy
-        from . import snap_to_ground_bpy
-        from . import spline_utils_bpy
-        from . import split_file_reader
         from . import telemetry_module_bpy as telemetry_native_module
-        from . import ui_bpy
-        from . import utils_bpy
 
-        # singleton instance
-        module_provider = module_install_utils_bpy.ModuleProvider()
+        HAS_BPY = True
 
         def init_polygoniq_global():
             global telemetry_module_bpy
@@ -72,58 +92,133 @@ if "asset_pack_bpy" not in locals():
             f"polib has been initialized without bpy, all polib modules that use bpy are imported as dummies only."
         )
 
-        import types
-
-        asset_pack_bpy = types.ModuleType("asset_pack_bpy")
-        color_utils = types.ModuleType("color_utils")
-        geonodes_mod_utils_bpy = types.ModuleType("geonodes_mod_utils_bpy")
-        installation_utils_bpy = types.ModuleType("installation_utils_bpy")
-        linalg_bpy = types.ModuleType("linalg_bpy")
-        log_helpers_bpy = types.ModuleType("log_helpers_bpy")
-        material_utils_bpy = types.ModuleType("material_utils_bpy")
-        module_install_utils_bpy = types.ModuleType("module_install_utils_bpy")
-        node_utils_bpy = types.ModuleType("node_utils_bpy")
-        preview_manager_bpy = types.ModuleType("preview_manager_bpy")
-        remove_duplicates_bpy = types.ModuleType("remove_duplicates_bpy")
-        render_bpy = types.ModuleType("render_bpy")
-        rigs_shared_bpy = types.ModuleType("rigs_shared_bpy")
-        snap_to_ground_bpy = types.ModuleType("snap_to_ground_bpy")
-        spline_utils_bpy = types.ModuleType("spline_utils_bpy")
-        split_file_reader = types.ModuleType("split_file_reader")
+        HAS_BPY = False
         telemetry_native_module = types.ModuleType("telemetry_native_module")
-        ui_bpy = types.ModuleType("ui_bpy")
-        utils_bpy = types.ModuleType("utils_bpy")
 
 
 else:
-    import importlib
-
     try:
         asset_pack = importlib.reload(asset_pack)
-        asset_pack_bpy = importlib.reload(asset_pack_bpy)
-        color_utils = importlib.reload(color_utils)
         bl_info_utils = importlib.reload(bl_info_utils)
-        geonodes_mod_utils_bpy = importlib.reload(geonodes_mod_utils_bpy)
-        installation_utils_bpy = importlib.reload(installation_utils_bpy)
-        linalg_bpy = importlib.reload(linalg_bpy)
-        log_helpers_bpy = importlib.reload(log_helpers_bpy)
-        material_utils_bpy = importlib.reload(material_utils_bpy)
-        module_install_utils_bpy = importlib.reload(module_install_utils_bpy)
-        node_utils_bpy = importlib.reload(node_utils_bpy)
-        remove_duplicates_bpy = importlib.reload(remove_duplicates_bpy)
-        render_bpy = importlib.reload(render_bpy)
-        rigs_shared_bpy = importlib.reload(rigs_shared_bpy)
-        snap_to_ground_bpy = importlib.reload(snap_to_ground_bpy)
-        spline_utils_bpy = importlib.reload(spline_utils_bpy)
-        split_file_reader = importlib.reload(split_file_reader)
         telemetry_native_module = importlib.reload(telemetry_native_module)
-        ui_bpy = importlib.reload(ui_bpy)
-        utils_bpy = importlib.reload(utils_bpy)
+        for _name in LAZY_SUBMODULES:
+            # Only the submodules imported so far, the rest is imported on first use
+            _module = globals().get(_name, None)
+            if _module is not None and sys.modules.get(_module.__name__, None) is _module:
+                globals()[_name] = importlib.reload(_module)
     except ImportError:
         # in case these are fake modules created with types.ModuleType (when bpy is not available)
         pass
 
 
+def _get_package_name() -> str:
+    """Returns the name polib is registered under in sys.modules.
+
+    Addons remap polib to a subpackage of their own package and remove the original name.
+    """
+    for module_name, module in list(sys.modules.items()):
+        if getattr(module, "__dict__", None) is globals():
+            return module_name
+    return __name__
+
+
+def _import_submodule(name: str) -> types.ModuleType:
+    if not HAS_BPY:
+        # Keep the same behavior as before lazy loading, modules without bpy are dummies only
+        module = types.ModuleType(name)
+        globals()[name] = module
+        return module
+
+    with _LAZY_IMPORT_LOCK:
+        if name in globals():
+            return globals()[name]
+
+        if threading.current_thread() is not threading.main_thread():
+            # Module level code of some submodules uses bpy, e.g. compiles GPU shaders, which is
+            # only safe on the main thread.
+            raise ImportError(
+                f"polib submodule {name} was first used outside of the main thread, "
+                f"import it with 'import_submodules' before starting the thread",
+                name=f"{__name__}.{name}",
+            )
+
+        logger.debug(f"Lazily importing polib submodule {name}")
+        # The submodule is loaded from its file under the name polib is registered under, e.g.
+        # a subpackage of the addon. Its relative imports then resolve to this module, lazily
+        # imported siblings included, without touching sys.path or names outside of the package.
+        module_name = f"{_get_package_name()}.{name}"
+        spec = importlib.util.spec_from_file_location(
+            module_name, os.path.join(os.path.dirname(os.path.abspath(__file__)), f"{name}.py")
+        )
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[module_name] = module
+        try:
+            spec.loader.exec_module(module)
+        except:
+            del sys.modules[module_name]
+            raise
+
+        globals()[name] = module
+        return module
+
+
+def import_submodules(*names: str) -> None:
+    """Imports the lazily imported submodules right away.
+
+    Lazy imports are only possible on the main thread, call this before starting a thread that
+    uses submodules which might not have been imported yet.
+    """
+    for name in names:
+        if name not in LAZY_SUBMODULES:
+            raise ValueError(f"{name} is not a lazily imported submodule of {__name__}")
+        _import_submodule(name)
+
+
+def __getattr__(name: str) -> typing.Any:
+    if name in LAZY_SUBMODULES:
+        return _import_submodule(name)
+    if name == "module_provider":
+        # singleton instance
+        globals()["module_provider"] = __getattr__("module_install_utils_bpy").ModuleProvider()
+        return globals()["module_provider"]
+    raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+
+
+def __dir__() -> typing.List[str]:
+    return sorted(set(globals().keys()) | LAZY_SUBMODULES | {"module_provider"})
+
+
+if EAGER_IMPORT:
+    for _name in sorted(LAZY_SUBMODULES):
+        _import_submodule(_name)
+
+
+if typing.TYPE_CHECKING:
+    from . import asset_pack_bpy
+    from . import color_utils
+    from . import geonodes_mod_utils_bpy
+    from . import http_session
+    from . import installation_utils_bpy
+    from . import linalg_bpy
+    from . import log_helpers_bpy
+    from . import material_utils_bpy
+    from . import metrics
+    from . import module_install_utils_bpy
+    from . import node_utils_bpy
+    from . import preview_manager_bpy
+    from . import remove_duplicates_bpy
+    from . import render_bpy
+    from . import rigs_shared_bpy
+    from . import snap_to_ground_bpy
+    from . import spline_utils_bpy
+    from . import split_file_reader
+    from . import timers_bpy
+    from . import ui_bpy
+    from . import utils_bpy
+
+    module_provider: module_install_utils_bpy.ModuleProvider
+
+
 # fake bl_info so that this gets picked up by vscode blender integration
 bl_info = {
     "name": "polib",
@@ -146,10 +241,13 @@ __all__ = [
     "bl_info_utils",
     "geonodes_mod_utils_bpy",
     "get_telemetry",
+    "http_session",
+    "import_submodules",
     "installation_utils_bpy",
     "linalg_bpy",
     "log_helpers_bpy",
     "material_utils_bpy",
+    "metrics",
     "module_install_utils_bpy",
     "node_utils_bpy",
     "preview_manager_bpy",
@@ -160,6 +258,7 @@ __all__ = [
     "spline_utils_bpy",
     "split_file_reader",
     # telemetry_module_bpy intentionally missing, you should interact with it via get_telemetry
+    "timers_bpy",
     "ui_bpy",
     "utils_bpy",
 ]
@@ -11,7 +11,11 @@ import logging
 try:
     import hatchery
 except ImportError:
-    from blender_addons import hatchery
+    try:
+        from blender_addons import hatchery
+    except ImportError:
+        # Addons remap hatchery next to polib in their own package
+        from .. import hatchery
 logger = logging.getLogger(f"polygoniq.{__name__}")
 
 
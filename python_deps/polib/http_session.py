@@ -0,0 +1,294 @@
+#!/usr/bin/python3
+# copyright (c) 2018- polygoniq xyz s.r.o.
+
+import hashlib
+import http.client
+import json
+import logging
+import os
+import ssl
+import tempfile
+import threading
+import typing
+import urllib.error
+import urllib.parse
+import urllib.request
+
+logger = logging.getLogger(f"polygoniq.{__name__}")
+
+
+MAX_REDIRECTS = 5
+REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+# Responses to requests with these headers are never cached on disk, lowercase
+CREDENTIAL_HEADERS = {"authorization", "proxy-authorization", "private-token", "cookie"}
+
+
+class HttpSession:
+    """HTTP GET client keeping one keep-alive connection per host and caching responses on disk.
+
+    Responses with an ETag or Last-Modified header are stored in 'cache_dir', the next request of
+    the same URL is conditional and a 304 Not Modified response is served from the cache. Parsed
+    JSON is also kept in memory, 'get_json' returns the same object as long as the server answers
+    304, treat it as read-only.
+
+    Responses to requests carrying credentials, e.g. a PRIVATE-TOKEN header, are not cached.
+    'cache_dir' is created readable only by the current user and it isn't used at all if it
+    turns out to be accessible to others, e.g. when someone else created it first.
+
+    Errors are raised as urllib.error.HTTPError and urllib.error.URLError, the same as with
+    urllib.request.urlopen. If a proxy is configured for the URL, the request goes through urllib
+    without the keep-alive connections.
+    """
+
+    def __init__(self, cache_dir: str, timeout: float = 30.0):
+        self.cache_dir = cache_dir
+        self.timeout = timeout
+        # Guards the dictionaries, each connection is guarded by its own lock
+        self._lock = threading.Lock()
+        self._connections: typing.Dict[typing.Tuple[str, str], http.client.HTTPConnection] = {}
+        self._connection_locks: typing.Dict[typing.Tuple[str, str], threading.Lock] = {}
+        # Cache key -> (validator, parsed JSON)
+        self._json_cache: typing.Dict[str, typing.Tuple[str, typing.Any]] = {}
+        # Checked on first use of the disk cache
+        self._cache_dir_private: typing.Optional[bool] = None
+        try:
+            self._ssl_context = ssl._create_unverified_context()
+        except:
+            # Some blender packaged python versions don't have this
+            self._ssl_context = None
+
+    def get(self, url: str, headers: typing.Optional[typing.Dict[str, str]] = None) -> bytes:
+        """Returns body of the response to GET 'url', revalidated from the cache if possible"""
+        _, _, body = self._get_cached(url, headers or {})
+        return body
+
+    def get_json(
+        self, url: str, headers: typing.Optional[typing.Dict[str, str]] = None
+    ) -> typing.Any:
+        """Returns the parsed JSON response to GET 'url', parses it only if it changed"""
+        key, validator, body = self._get_cached(url, headers or {})
+        with self._lock:
+            cached = self._json_cache.get(key, None)
+        if validator is not None and cached is not None and cached[0] == validator:
+            return cached[1]
+
+        value = json.loads(body.decode())
+        if validator is not None:
+            with self._lock:
+                self._json_cache[key] = (validator, value)
+        return value
+
+    def close(self) -> None:
+        """Closes all keep-alive connections, the cache stays"""
+        with self._lock:
+            connections = list(self._connections.values())
+            self._connections.clear()
+        for connection in connections:
+            connection.close()
+
+    def _get_cached(
+        self, url: str, headers: typing.Dict[str, str]
+    ) -> typing.Tuple[str, typing.Optional[str], bytes]:
+        """Returns the cache key, validator of the response and its body"""
+        key = HttpSession._get_cache_key(url, headers)
+        if HttpSession._has_credentials(headers) or not self._is_cache_dir_private():
+            status, response_headers, body = self._request(url, headers)
+            if status != 200:
+                raise urllib.error.HTTPError(
+                    url, status, http.client.responses.get(status, ""), response_headers, None
+                )
+            return key, None, body
+
+        entry = self._load_cache_entry(key)
+        request_headers = dict(headers)
+        if entry is not None:
+            if entry.get("etag", None) is not None:
+                request_headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified", None) is not None:
+                request_headers["If-Modified-Since"] = entry["last_modified"]
+
+        status, response_headers, body = self._request(url, request_headers)
+        if status == 304 and entry is not None:
+            cached_body = self._load_cache_body(key)
+            if cached_body is not None:
+                logger.debug(f"{url} not modified, using cached response")
+                validator = entry.get("etag", None) or entry.get("last_modified", None)
+                return key, validator, cached_body
+            # The body was removed from the cache, ask again without the validators
+            status, response_headers, body = self._request(url, headers)
+
+        if status != 200:
+            raise urllib.error.HTTPError(
+                url, status, http.client.responses.get(status, ""), response_headers, None
+            )
+
+        etag = response_headers.get("ETag", None)
+        last_modified = response_headers.get("Last-Modified", None)
+        if etag is None and last_modified is None:
+            return key, None, body
+        self._store_cache_entry(
+            key, {"url": url, "etag": etag, "last_modified": last_modified}, body
+        )
+        return key, etag or last_modified, body
+
+    def _request(
+        self, url: str, headers: typing.Dict[str, str]
+    ) -> typing.Tuple[int, http.client.HTTPMessage, bytes]:
+        for _ in range(MAX_REDIRECTS + 1):
+            parts = urllib.parse.urlsplit(url)
+            if parts.scheme not in {"http", "https"} or HttpSession._uses_proxy(parts):
+                return self._request_urllib(url, headers)
+
+            status, response_headers, body = self._request_keep_alive(parts, headers)
+            location = response_headers.get("Location", None)
+            if status not in REDIRECT_STATUSES or location is None:
+                return status, response_headers, body
+            url = urllib.parse.urljoin(url, location)
+        raise urllib.error.URLError(f"Too many redirects, last to {url}")
+
+    @staticmethod
+    def _uses_proxy(parts: urllib.parse.SplitResult) -> bool:
+        return parts.scheme in urllib.request.getproxies() and not urllib.request.proxy_bypass(
+            parts.hostname or ""
+        )
+
+    def _request_urllib(
+        self, url: str, headers: typing.Dict[str, str]
+    ) -> typing.Tuple[int, http.client.HTTPMessage, bytes]:
+        request = urllib.request.Request(url, headers=headers)
+        try:
+            if self._ssl_context is not None:
+                response = urllib.request.urlopen(
+                    request, context=self._ssl_context, timeout=self.timeout
+                )
+            else:
+                response = urllib.request.urlopen(request, timeout=self.timeout)
+        except urllib.error.HTTPError as e:
+            # Including 304, urllib treats it as an error
+            return e.code, e.headers, e.read()
+        with response:
+            return response.status, response.headers, response.read()
+
+    def _get_connection_lock(self, key: typing.Tuple[str, str]) -> threading.Lock:
+        with self._lock:
+            lock = self._connection_locks.get(key, None)
+            if lock is None:
+                lock = threading.Lock()
+                self._connection_locks[key] = lock
+            return lock
+
+    def _create_connection(self, parts: urllib.parse.SplitResult) -> http.client.HTTPConnection:
+        if parts.scheme == "https":
+            return http.client.HTTPSConnection(
+                parts.hostname, parts.port, timeout=self.timeout, context=self._ssl_context
+            )
+        return http.client.HTTPConnection(parts.hostname, parts.port, timeout=self.timeout)
+
+    def _request_keep_alive(
+        self, parts: urllib.parse.SplitResult, headers: typing.Dict[str, str]
+    ) -> typing.Tuple[int, http.client.HTTPMessage, bytes]:
+        key = (parts.scheme, parts.netloc)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+
+        with self._get_connection_lock(key):
+            with self._lock:
+                connection = self._connections.pop(key, None)
+            reused = connection is not None
+            while True:
+                if connection is None:
+                    connection = self._create_connection(parts)
+                try:
+                    connection.request("GET", path, headers=headers)
+                    response = connection.getresponse()
+                    body = response.read()
+                except (http.client.HTTPException, OSError) as e:
+                    connection.close()
+                    if reused:
+                        # The server closed the idle connection, try once more with a new one
+                        logger.debug(f"Keep-alive connection to {parts.netloc} was closed: {e}")
+                        reused = False
+                        connection = None
+                        continue
+                    raise urllib.error.URLError(e)
+                break
+
+            if response.will_close:
+                connection.close()
+            else:
+                with self._lock:
+                    self._connections[key] = connection
+            return response.status, response.headers, body
+
+    @staticmethod
+    def _has_credentials(headers: typing.Dict[str, str]) -> bool:
+        return any(name.lower() in CREDENTIAL_HEADERS for name in headers)
+
+    def _is_cache_dir_private(self) -> bool:
+        """Creates 'cache_dir' if needed, returns whether only the current user can access it"""
+        if self._cache_dir_private is not None:
+            return self._cache_dir_private
+
+        private = True
+        try:
+            os.makedirs(self.cache_dir, mode=0o700, exist_ok=True)
+            # Windows has no uids, the temp directory is private to the user there
+            if hasattr(os, "getuid"):
+                stat = os.stat(self.cache_dir)
+                private = stat.st_uid == os.getuid() and stat.st_mode & 0o077 == 0
+        except OSError:
+            logger.exception(f"Can't create HTTP cache directory {self.cache_dir}")
+            private = False
+        if not private:
+            logger.warning(f"HTTP cache directory {self.cache_dir} is not private, not caching")
+        self._cache_dir_private = private
+        return private
+
+    @staticmethod
+    def _get_cache_key(url: str, headers: typing.Dict[str, str]) -> str:
+        # Responses can differ by headers, e.g. by the access token
+        key = url + "\n".join(
+            f"\n{name.lower()}:{value}" for name, value in sorted(headers.items())
+        )
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    def _load_cache_entry(self, key: str) -> typing.Optional[typing.Dict[str, typing.Any]]:
+        try:
+            with open(os.path.join(self.cache_dir, f"{key}.json")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _load_cache_body(self, key: str) -> typing.Optional[bytes]:
+        try:
+            with open(os.path.join(self.cache_dir, f"{key}.body"), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _store_cache_entry(
+        self, key: str, entry: typing.Dict[str, typing.Any], body: bytes
+    ) -> None:
+        try:
+            # The body goes first, the entry is written only once its body is complete
+            for path, data in [
+                (os.path.join(self.cache_dir, f"{key}.body"), body),
+                (os.path.join(self.cache_dir, f"{key}.json"), json.dumps(entry).encode("utf-8")),
+            ]:
+                temp_path = f"{path}.{threading.get_ident()}.tmp"
+                with open(temp_path, "wb") as f:
+                    f.write(data)
+                os.replace(temp_path, path)
+        except OSError:
+            logger.exception(f"Can't store cached response of {entry['url']}")
+
+
+# Separate for each user, the temp directory may be shared
+CACHE_DIR = os.path.join(
+    tempfile.gettempdir(),
+    f"polygoniq_http_cache_{os.getuid()}" if hasattr(os, "getuid") else "polygoniq_http_cache",
+)
+
+# Shared by the addon updater and the release info requests
+HTTP_SESSION = HttpSession(CACHE_DIR)
@@ -5,6 +5,7 @@ import zipfile
 import bpy
 import typing
 import addon_utils
+from . import timers_bpy
 
 
 def get_addon_version_in_blender(full_name: str) -> typing.Optional[typing.Iterable[int]]:
@@ -66,8 +67,12 @@ def install_addon_zip(zip_file_path: str, module_name: str) -> None:
 
     # we do the actual update in the blender event loop to avoid crashes in case
     # grumpy_cat is updating itself
-    bpy.app.timers.register(
-        lambda: refresh_and_enable(module_name), first_interval=0, persistent=True
+    timers_bpy.TIMER_REGISTRY.register(
+        __name__,
+        lambda: refresh_and_enable(module_name),
+        first_interval=0,
+        persistent=True,
+        name="refresh_and_enable",
     )
 
 
@@ -3,14 +3,19 @@
 
 import bpy
 import datetime
+import functools
 import tempfile
 import typing
 import time
 import logging
 import os
-import shutil
+import threading
+import zipfile
+from . import metrics
 from . import telemetry_module_bpy
 
+logger = logging.getLogger(f"polygoniq.{__name__}")
+
 
 def logged_operator(cls: typing.Type[bpy.types.Operator]):
     assert issubclass(
@@ -34,13 +39,20 @@ def logged_operator(cls: typing.Type[bpy.types.Operator]):
         cls._original_modal = cls.modal
 
         def new_modal(self, context: bpy.types.Context, event: bpy.types.Event):
+            start_time = time.perf_counter()
             try:
-                return cls._original_modal(self, context, event)
+                return metrics.SLOW_CALL_PROFILER.call(
+                    f"{cls.__name__}.modal", cls._original_modal, self, context, event
+                )
             except:
                 logger.exception(f"Uncaught exception raised in {cls}.modal")
                 # If exception is thrown out of the modal we want to exit it. If there are possible
                 # exceptions that can occur, they should be handled in the modal itself.
                 return {'FINISHED'}
+            finally:
+                metrics.OPERATOR_METRICS.record(
+                    f"{cls.__name__}.modal", time.perf_counter() - start_time
+                )
 
         cls.modal = new_modal
 
@@ -51,12 +63,14 @@ def logged_operator(cls: typing.Type[bpy.types.Operator]):
             logger.info(
                 f"{cls.__name__} operator execute started with arguments {self.as_keywords()}"
             )
-            start_time = time.time()
+            start_time = time.perf_counter()
             try:
-                ret = cls._original_execute(self, context)
+                ret = metrics.SLOW_CALL_PROFILER.call(
+                    f"{cls.__name__}.execute", cls._original_execute, self, context
+                )
                 logger.info(
-                    f"{cls.__name__} operator execute finished in {time.time() - start_time:.3f} "
-                    f"seconds with result {ret}"
+                    f"{cls.__name__} operator execute finished in "
+                    f"{time.perf_counter() - start_time:.3f} seconds with result {ret}"
                 )
                 return ret
             except:
@@ -64,6 +78,10 @@ def logged_operator(cls: typing.Type[bpy.types.Operator]):
                 # We return finished even in case an error happened, that way the user will be able
                 # to undo any changes the operator has made up until the error happened
                 return {'FINISHED'}
+            finally:
+                metrics.OPERATOR_METRICS.record(
+                    f"{cls.__name__}.execute", time.perf_counter() - start_time
+                )
 
         cls.execute = new_execute
 
@@ -72,8 +90,11 @@ def logged_operator(cls: typing.Type[bpy.types.Operator]):
 
         def new_invoke(self, context: bpy.types.Context, event: bpy.types.Event):
             logger.debug(f"{cls.__name__} operator invoke started")
+            start_time = time.perf_counter()
             try:
-                ret = cls._original_invoke(self, context, event)
+                ret = metrics.SLOW_CALL_PROFILER.call(
+                    f"{cls.__name__}.invoke", cls._original_invoke, self, context, event
+                )
                 logger.debug(f"{cls.__name__} operator invoke finished")
                 return ret
             except:
@@ -81,6 +102,10 @@ def logged_operator(cls: typing.Type[bpy.types.Operator]):
                 # We return finished even in case an error happened, that way the user will be able
                 # to undo any changes the operator has made up until the error happened
                 return {'FINISHED'}
+            finally:
+                metrics.OPERATOR_METRICS.record(
+                    f"{cls.__name__}.invoke", time.perf_counter() - start_time
+                )
 
         cls.invoke = new_invoke
 
@@ -98,10 +123,15 @@ def logged_panel(cls: typing.Type[bpy.types.Panel]):
         cls._original_draw_header = cls.draw_header
 
         def new_draw_header(self, context: bpy.types.Context):
+            start_time = time.perf_counter()
             try:
                 return cls._original_draw_header(self, context)
             except:
                 logger.exception(f"Uncaught exception raised in {cls}.draw_header")
+            finally:
+                metrics.FRAME_BUDGET_MONITOR.record(
+                    f"{cls.__name__}.draw_header", time.perf_counter() - start_time
+                )
 
         cls.draw_header = new_draw_header
 
@@ -109,10 +139,15 @@ def logged_panel(cls: typing.Type[bpy.types.Panel]):
         cls._original_draw = cls.draw
 
         def new_draw(self, context: bpy.types.Context):
+            start_time = time.perf_counter()
             try:
                 return cls._original_draw(self, context)
             except:
                 logger.exception(f"Uncaught exception raised in {cls}.draw")
+            finally:
+                metrics.FRAME_BUDGET_MONITOR.record(
+                    f"{cls.__name__}.draw", time.perf_counter() - start_time
+                )
 
         cls.draw = new_draw
 
@@ -130,26 +165,194 @@ def logged_preferences(cls: typing.Type[bpy.types.AddonPreferences]):
         cls._original_draw = cls.draw
 
         def new_draw(self, context: bpy.types.Context):
+            start_time = time.perf_counter()
             try:
                 return cls._original_draw(self, context)
             except:
                 logger.exception(f"Uncaught exception raised in {cls}.draw")
+            finally:
+                metrics.FRAME_BUDGET_MONITOR.record(
+                    f"{cls.__name__}.draw", time.perf_counter() - start_time
+                )
 
         cls.draw = new_draw
 
     return cls
 
 
-def pack_logs(telemetry: telemetry_module_bpy.TelemetryWrapper) -> str:
-    """Pack all logs into zip, create new timestamped directory in tempdir and save the zip there."""
+def timed_draw_handler(name: str, function: typing.Callable) -> typing.Callable:
+    """Wraps a draw handler callback to record its durations in the frame budget monitor"""
+
+    @functools.wraps(function)
+    def wrapper(*args):
+        start_time = time.perf_counter()
+        try:
+            return function(*args)
+        finally:
+            metrics.FRAME_BUDGET_MONITOR.record(name, time.perf_counter() - start_time)
+
+    return wrapper
+
+
+class LogArchiver(threading.Thread):
+    """Zips files of a log directory in a worker thread, streaming them in one by one.
+
+    The newest files are added first. Once their total uncompressed size would exceed
+    'max_total_size' bytes, the remaining older files are skipped. Poll 'progress' and
+    'is_alive()' from the main thread, 'error' holds the exception if archiving failed.
+    'before_archiving' is called first in the worker thread, e.g. to write pending logs.
+
+    Once cancelled, the partial archive is removed, together with its directory if it's empty,
+    and 'cancelled' is set.
+    """
+
+    def __init__(
+        self,
+        log_path: str,
+        archive_path: str,
+        compression_level: int = 6,
+        max_total_size: typing.Optional[int] = None,
+        before_archiving: typing.Optional[typing.Callable[[], typing.Any]] = None,
+    ):
+        super().__init__(name="polib_log_archiver", daemon=True)
+        self.log_path = log_path
+        self.archive_path = archive_path
+        self.compression_level = compression_level
+        self.max_total_size = max_total_size
+        self.before_archiving = before_archiving
+        self.progress = 0.0
+        self.skipped_files: typing.List[str] = []
+        self.error: typing.Optional[Exception] = None
+        self.cancelled = False
+        self._cancel = threading.Event()
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    def _collect_files(self) -> typing.List[typing.Tuple[str, str, int]]:
+        """Returns (path, name in archive, size) of files to archive, newest first"""
+        files = []
+        for root, _, filenames in os.walk(self.log_path):
+            for filename in filenames:
+                path = os.path.join(root, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    # Files can be rotated away while we walk the directory
+                    continue
+                files.append((stat.st_mtime, path, stat.st_size))
+        files.sort(reverse=True)
+
+        selected = []
+        total_size = 0
+        cap_reached = False
+        for _, path, size in files:
+            if self.max_total_size is not None and total_size + size > self.max_total_size:
+                # Keep the logs contiguous in time, all older files are skipped as well
+                cap_reached = True
+            if cap_reached:
+                self.skipped_files.append(path)
+                continue
+            total_size += size
+            selected.append((path, os.path.relpath(path, self.log_path), size))
+        return selected
+
+    def _remove_archive(self) -> None:
+        try:
+            os.remove(self.archive_path)
+        except FileNotFoundError:
+            pass
+        try:
+            os.rmdir(os.path.dirname(self.archive_path))
+        except OSError:
+            # Not empty, the directory wasn't created just for the archive
+            pass
+
+    def run(self) -> None:
+        try:
+            if self.before_archiving is not None:
+                self.before_archiving()
+            files = self._collect_files()
+            total_size = max(1, sum(size for _, _, size in files))
+            archived_size = 0
+            cancelled = False
+            with zipfile.ZipFile(
+                self.archive_path,
+                "w",
+                compression=zipfile.ZIP_DEFLATED,
+                compresslevel=self.compression_level,
+                strict_timestamps=False,
+            ) as archive:
+                for path, arcname, size in files:
+                    if self._cancel.is_set():
+                        cancelled = True
+                        break
+                    try:
+                        archive.write(path, arcname)
+                    except FileNotFoundError:
+                        self.skipped_files.append(path)
+                    archived_size += size
+                    self.progress = archived_size / total_size
+            if cancelled:
+                logger.info(f"Packing logs was cancelled, removing {self.archive_path}")
+                self._remove_archive()
+                self.cancelled = True
+                return
+            if len(self.skipped_files) > 0:
+                logger.info(
+                    f"Skipped {len(self.skipped_files)} log files over the size cap or removed "
+                    f"while archiving"
+                )
+            self.progress = 1.0
+        except Exception as e:
+            logger.exception(f"Failed to archive logs from {self.log_path}")
+            self.error = e
+
+
+def _create_log_archiver(
+    telemetry: telemetry_module_bpy.TelemetryWrapper,
+    compression_level: int,
+    max_total_size: typing.Optional[int],
+) -> LogArchiver:
     temp_folder = tempfile.gettempdir()
     log_path = os.path.join(temp_folder, "polygoniq_logs")
     os.makedirs(log_path, exist_ok=True)
-    with open(os.path.join(log_path, "latest_telemetry.txt"), "w") as f:
-        f.write(telemetry.dump())
     now = datetime.datetime.now()
     output_folder_name = f"polygoniq_logs--{now.year:04d}-{now.month:02d}-{now.day:02d}T{now.hour:02d}-{now.minute:02d}-{now.second:02d}"
     output_folder_path = os.path.join(temp_folder, output_folder_name)
     os.mkdir(output_folder_path)
-    shutil.make_archive(os.path.join(output_folder_path, "polygoniq_logs"), "zip", log_path)
-    return output_folder_path
+    return LogArchiver(
+        log_path,
+        os.path.join(output_folder_path, "polygoniq_logs.zip"),
+        compression_level,
+        max_total_size,
+        # Telemetry is streamed to the log directory continuously, we just make sure it's up to date
+        telemetry.flush,
+    )
+
+
+def start_pack_logs(
+    telemetry: telemetry_module_bpy.TelemetryWrapper,
+    compression_level: int = 6,
+    max_total_size: typing.Optional[int] = None,
+) -> LogArchiver:
+    """Starts packing all logs into zip in a worker thread, see 'pack_logs'.
+
+    The zip is saved to os.path.dirname(archiver.archive_path) once the returned archiver finishes.
+    """
+    archiver = _create_log_archiver(telemetry, compression_level, max_total_size)
+    archiver.start()
+    return archiver
+
+
+def pack_logs(
+    telemetry: telemetry_module_bpy.TelemetryWrapper,
+    compression_level: int = 6,
+    max_total_size: typing.Optional[int] = None,
+) -> str:
+    """Pack all logs into zip, create new timestamped directory in tempdir and save the zip there."""
+    archiver = _create_log_archiver(telemetry, compression_level, max_total_size)
+    archiver.run()
+    if archiver.error is not None:
+        raise archiver.error
+    return os.path.dirname(archiver.archive_path)
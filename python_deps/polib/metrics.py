@@ -0,0 +1,289 @@
+#!/usr/bin/python3
+# copyright (c) 2018- polygoniq xyz s.r.o.
+
+import collections
+import cProfile
+import csv
+import datetime
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+import typing
+
+logger = logging.getLogger(f"polygoniq.{__name__}")
+
+
+class LatencyHistogram:
+    """Log-linear histogram of latencies in the spirit of HdrHistogram.
+
+    Values are recorded in whole microseconds. Values lower than 2 * SUB_BUCKET_COUNT are stored
+    exactly, each higher power of two range is split into SUB_BUCKET_COUNT linear buckets. Relative
+    error of the reported percentiles is thus at most 1 / SUB_BUCKET_COUNT for any magnitude and
+    memory doesn't grow with the number of recorded values.
+    """
+
+    SUB_BUCKET_BITS = 5
+    SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+
+    def __init__(self):
+        self.count = 0
+        self.total_us = 0
+        self.max_us = 0
+        self._buckets: typing.Dict[int, int] = {}
+
+    @classmethod
+    def _bucket_index(cls, value: int) -> int:
+        if value < 2 * cls.SUB_BUCKET_COUNT:
+            return value
+        shift = value.bit_length() - cls.SUB_BUCKET_BITS - 1
+        return shift * cls.SUB_BUCKET_COUNT + (value >> shift)
+
+    @classmethod
+    def _bucket_upper_bound(cls, index: int) -> int:
+        if index < 2 * cls.SUB_BUCKET_COUNT:
+            return index
+        shift = index // cls.SUB_BUCKET_COUNT - 1
+        sub_bucket = index - shift * cls.SUB_BUCKET_COUNT
+        return ((sub_bucket + 1) << shift) - 1
+
+    def record(self, seconds: float) -> None:
+        value = max(0, int(seconds * 1_000_000))
+        index = LatencyHistogram._bucket_index(value)
+        self._buckets[index] = self._buckets.get(index, 0) + 1
+        self.count += 1
+        self.total_us += value
+        self.max_us = max(self.max_us, value)
+
+    def percentile(self, percent: float) -> float:
+        """Returns the 'percent' percentile in milliseconds, 0.0 if nothing was recorded"""
+        if self.count == 0:
+            return 0.0
+
+        target = max(1, int(round(percent / 100.0 * self.count)))
+        seen = 0
+        for index in sorted(self._buckets):
+            seen += self._buckets[index]
+            if seen >= target:
+                return min(LatencyHistogram._bucket_upper_bound(index), self.max_us) / 1000.0
+        return self.max_us / 1000.0
+
+    def summary(self) -> typing.Dict[str, float]:
+        """Returns count and the latency statistics in milliseconds"""
+        return {
+            "count": self.count,
+            "mean": self.total_us / self.count / 1000.0 if self.count > 0 else 0.0,
+            "p50": self.percentile(50.0),
+            "p95": self.percentile(95.0),
+            "p99": self.percentile(99.0),
+            "max": self.max_us / 1000.0,
+        }
+
+
+class MetricsRegistry:
+    """Latency histograms keyed by name, e.g. 'OperatorClass.execute'"""
+
+    COLUMNS = ["name", "count", "mean", "p50", "p95", "p99", "max"]
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: typing.Dict[str, LatencyHistogram] = {}
+
+    def record(self, name: str, seconds: float) -> None:
+        with self._lock:
+            histogram = self._histograms.get(name, None)
+            if histogram is None:
+                histogram = LatencyHistogram()
+                self._histograms[name] = histogram
+            histogram.record(seconds)
+
+    def get_summaries(self) -> typing.List[typing.Dict[str, typing.Any]]:
+        """Returns summaries of all histograms sorted by name, see 'COLUMNS'"""
+        with self._lock:
+            return [
+                {"name": name, **histogram.summary()}
+                for name, histogram in sorted(self._histograms.items())
+            ]
+
+    def export_csv(self, path: str) -> None:
+        summaries = self.get_summaries()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=MetricsRegistry.COLUMNS)
+            writer.writeheader()
+            writer.writerows(summaries)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+
+
+class SlowCallProfiler:
+    """Takes a cProfile capture of calls slower than 'threshold' seconds.
+
+    There is no way to know upfront whether a call will be slow, so once 'threshold' is set every
+    call is profiled and the capture is kept only if the call was slow. This slows down all
+    profiled calls, it's meant to be enabled only while hunting a performance issue. Captures
+    are written as .prof files to 'output_dir', only the newest 'max_captures' are kept.
+    """
+
+    def __init__(self, output_dir: str, max_captures: int = 20):
+        self.output_dir = output_dir
+        self.max_captures = max_captures
+        # None disables the profiling
+        self.threshold: typing.Optional[float] = None
+        # Only one profiler can be active at a time, nested calls are not profiled separately
+        self._active = threading.Lock()
+
+    def call(self, name: str, function: typing.Callable, *args, **kwargs) -> typing.Any:
+        threshold = self.threshold
+        if threshold is None or not self._active.acquire(blocking=False):
+            return function(*args, **kwargs)
+
+        try:
+            profile = cProfile.Profile()
+            start_time = time.perf_counter()
+            try:
+                profile.enable()
+            except ValueError:
+                # Another profiler, e.g. the one of a debugger, is already active
+                return function(*args, **kwargs)
+            try:
+                return function(*args, **kwargs)
+            finally:
+                profile.disable()
+                duration = time.perf_counter() - start_time
+                if duration >= threshold:
+                    self._save_capture(name, duration, profile)
+        finally:
+            self._active.release()
+
+    def _save_capture(self, name: str, duration: float, profile: cProfile.Profile) -> None:
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]", "_", name)
+        timestamp = datetime.datetime.now().strftime("%Y-%m-%dT%H-%M-%S-%f")
+        path = os.path.join(
+            self.output_dir, f"{safe_name}--{timestamp}--{int(duration * 1000)}ms.prof"
+        )
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            profile.dump_stats(path)
+            logger.info(f"{name} took {duration:.3f} seconds, profile saved to {path}")
+            self._remove_old_captures()
+        except:
+            logger.exception(f"Can't save profile of {name} to {path}")
+
+    def _remove_old_captures(self) -> None:
+        captures = [
+            os.path.join(self.output_dir, filename)
+            for filename in os.listdir(self.output_dir)
+            if filename.endswith(".prof")
+        ]
+        if len(captures) <= self.max_captures:
+            return
+        captures.sort(key=os.path.getmtime)
+        for path in captures[: len(captures) - self.max_captures]:
+            os.remove(path)
+
+
+class CallbackStats:
+    def __init__(self, window: int):
+        self.count = 0
+        self.over_budget = 0
+        self.recent: typing.Deque[float] = collections.deque(maxlen=window)
+        self.last_warning_time: typing.Optional[float] = None
+        self.suppressed_warnings = 0
+
+    def summary(self) -> typing.Dict[str, float]:
+        """Returns counts and statistics of the recent durations in milliseconds"""
+        recent = sorted(self.recent)
+        if len(recent) == 0:
+            return {"count": self.count, "over_budget": self.over_budget}
+        return {
+            "count": self.count,
+            "over_budget": self.over_budget,
+            "mean": sum(recent) / len(recent) * 1000.0,
+            "p95": recent[min(len(recent) - 1, int(len(recent) * 0.95))] * 1000.0,
+            "max": recent[-1] * 1000.0,
+        }
+
+
+class FrameBudgetMonitor:
+    """Tracks durations of UI callbacks - panel draws, draw handlers - against a time budget.
+
+    Each callback keeps rolling statistics of its last 'window' calls. A call slower than
+    the callback budget logs a warning, at most once per 'warning_interval' seconds for each
+    callback, redraws happen many times per second and would flood the log otherwise.
+    """
+
+    def __init__(
+        self, default_budget: float = 0.004, window: int = 240, warning_interval: float = 30.0
+    ):
+        self.default_budget = default_budget
+        self.window = window
+        self.warning_interval = warning_interval
+        self._budgets: typing.Dict[str, float] = {}
+        self._stats: typing.Dict[str, CallbackStats] = {}
+        self._lock = threading.Lock()
+
+    def set_budget(self, name: str, seconds: float) -> None:
+        self._budgets[name] = seconds
+
+    def record(self, name: str, seconds: float) -> None:
+        budget = self._budgets.get(name, self.default_budget)
+        suppressed_warnings = None
+        with self._lock:
+            stats = self._stats.get(name, None)
+            if stats is None:
+                stats = CallbackStats(self.window)
+                self._stats[name] = stats
+            stats.count += 1
+            stats.recent.append(seconds)
+            if seconds <= budget:
+                return
+
+            stats.over_budget += 1
+            now = time.monotonic()
+            if (
+                stats.last_warning_time is None
+                or now - stats.last_warning_time >= self.warning_interval
+            ):
+                stats.last_warning_time = now
+                suppressed_warnings = stats.suppressed_warnings
+                stats.suppressed_warnings = 0
+                recent_summary = stats.summary()
+            else:
+                stats.suppressed_warnings += 1
+
+        if suppressed_warnings is not None:
+            logger.warning(
+                f"{name} took {seconds * 1000.0:.1f} ms, over its {budget * 1000.0:.1f} ms "
+                f"budget, {suppressed_warnings} more times since the last warning, "
+                f"recent stats: {recent_summary}"
+            )
+
+    def get_summaries(self) -> typing.List[typing.Dict[str, typing.Any]]:
+        with self._lock:
+            return [
+                {
+                    "name": name,
+                    "budget": self._budgets.get(name, self.default_budget) * 1000.0,
+                    **stats.summary(),
+                }
+                for name, stats in sorted(self._stats.items())
+            ]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+
+LOG_DIR = os.path.join(tempfile.gettempdir(), "polygoniq_logs")
+
+# Latencies of operator execute, invoke and modal calls, fed by log_helpers_bpy.logged_operator
+OPERATOR_METRICS = MetricsRegistry()
+SLOW_CALL_PROFILER = SlowCallProfiler(os.path.join(LOG_DIR, "profiles"))
+# Durations of panel draws and draw handlers, fed by log_helpers_bpy
+FRAME_BUDGET_MONITOR = FrameBudgetMonitor()
+
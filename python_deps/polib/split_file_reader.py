@@ -22,10 +22,19 @@
 """
 
 
+import bisect
+import collections
+import concurrent.futures
+import hashlib
 import io
 import logging
+import mmap
 import os
+import queue
+import threading
 import typing
+import zipfile
+import zlib
 
 logger = logging.getLogger(f"polygoniq.{__name__}")
 
@@ -35,6 +44,9 @@ _BACKWARD = -1
 _STATIONARY = 0
 _FORWARD = 1
 
+# os.pread is not available on Windows
+_HAS_PREAD = hasattr(os, "pread")
+
 
 class SplitFileReader(io.RawIOBase):
     """Acts file-like for a list of files opened readably in binary mode.
@@ -60,14 +72,39 @@ class SplitFileReader(io.RawIOBase):
     currently open file.  The list order is important, and it must be indexable.  The entries in `files` do not
     need to be unique.
 
-    `close` must be called just like any other file, or a single file descriptor may be left open.  Making use of the
-    context managed approach will take care of that as well.  If str or path-like values are passed, they will be closed
+    `close` must be called just like any other file, or file descriptors may be left open.  Making use of the context
+    managed approach will take care of that as well.  If str or path-like values are passed, they will be closed
     automatically; but if file-like objects are passed, they will not be closed, manage those objects externally with
     their own context managers.
 
     This class is not thread-safe; no method is idempotent, all of them affect the object state.  However, since the
     underlying files are all read-only, multiple concurrent instances of this class, attached to the same underlying
     files, is allowed.
+
+    Files given as paths are kept open in a pool of up to `max_open_files` file descriptors, the least recently used
+    one is closed when another file has to be opened.  `ZipFile` jumps between the central directory in the last files
+    and the local headers in the first ones, the pool spares reopening the same files on each jump.
+
+    The exception is `pread`, it reads at an absolute offset without touching the position of the reader and can be
+    called from many threads at once.  Files given as paths are read through a shared set of file descriptors opened
+    just for `pread`.  File-like objects are shared with the sequential reads, don't mix those with `pread` in threads.
+
+    With `use_index` the sizes of all files are measured once at `__init__`, or taken from `part_sizes` if the caller
+    already knows them.  Seeks then jump directly to the right file, found by bisecting the cumulative offsets, instead
+    of opening every file in between.  The files must not change size while the index is in use.
+
+    With `use_mmap` each file is memory-mapped on first access and all reads and seeks are served from the mapped
+    views, without any system calls, the OS page cache takes care of readahead.  `view_range` returns zero-copy views
+    of any byte range.  Only paths are supported in this mode, not file-like objects, and it implies `use_index`.
+
+    With `prefetch_blocks` a background thread reads up to that many blocks of `prefetch_block_size` bytes ahead of the
+    current position, through its own set of file descriptors.  Sequential reads, e.g. `stream_only` or `tarfile`
+    streaming, are then served from memory while the disk keeps working, the next file is opened before the reads
+    reach it.  A seek discards the blocks read ahead and restarts the thread at the new position, so it doesn't pay
+    off for random access.  Only paths are supported in this mode and it implies `use_index`.
+
+    Hashers attached by `attach_hasher` are updated with all bytes returned by `read` and `readinto`, a download can
+    be verified while it is being unpacked, without reading it twice.  See `verify_parts` for checking the files alone.
     """
 
     def __init__(  # noqa: PLR0913
@@ -77,6 +114,12 @@ class SplitFileReader(io.RawIOBase):
         stream_only: bool = False,
         validate_all_readable: bool = False,
         iter_size: int = 1,
+        use_index: bool = False,
+        part_sizes: typing.Optional[typing.List[int]] = None,
+        use_mmap: bool = False,
+        max_open_files: int = 4,
+        prefetch_blocks: int = 0,
+        prefetch_block_size: int = 1024 * 1024,
     ) -> None:
         """Creates the file-like object around a series of files.  At return, there will be a single open file descriptor,
         on the first file in the list.
@@ -84,12 +127,27 @@ class SplitFileReader(io.RawIOBase):
         `files` may be any of os.PathLike, a `str` or any `file-like` object available.  If it is a `str` or `PathLike`
         a new `open()` will be called with that value as a parameter in a context manager.  Otherwise, the file-like
         will have `seek`, `tell`, and `read` called on it directly.  Any mix of types is allowed in the list.
+
+        Passing `part_sizes` implies `use_index`, it has to contain the size of each file in `files`.
+
+        `max_open_files` limits how many files given as paths are kept open at once, 1 closes each file as soon as the
+        reader moves to another one.
+
+        `prefetch_blocks` greater than 0 enables the prefetch mode, see the class docstring.
         """
         if mode not in ["rb", "br", "r"]:
             # On Unix, "r" and "rb" are the same.  On windows, "r" will alter line endings.
             raise ValueError(f"mode must be 'rb', was {mode}")
         if stream_only and validate_all_readable:
             raise ValueError("`stream_only` and `validate_all_readable` cannot both be set.")
+        if max_open_files < 1:
+            raise ValueError(f"`max_open_files` must be at least 1, was {max_open_files}")
+        if prefetch_blocks < 0 or prefetch_block_size < 1:
+            raise ValueError("`prefetch_blocks` can't be negative and `prefetch_block_size` must be positive.")
+        if prefetch_blocks > 0 and use_mmap:
+            raise ValueError("`prefetch_blocks` and `use_mmap` cannot both be set.")
+        if prefetch_blocks > 0 and not all(isinstance(file, (str, os.PathLike)) for file in files):
+            raise ValueError("`prefetch_blocks` requires all files to be paths.")
         # Need to track a list of files, in order, to concat.  Must be random-accessible.
         self._files = files
         # When using this class as an iterable, or if attached to some sort of streaming output systems, set this to
@@ -99,6 +157,10 @@ class SplitFileReader(io.RawIOBase):
         # function.  This can be set at any time between read/__next__ calls.
         self._iter_size = iter_size
 
+        # Open files given as paths, keyed by their index in `files`, ordered from the least recently used.
+        self._max_open_files = max_open_files
+        self._open_files: typing.OrderedDict[int, typing.BinaryIO] = collections.OrderedDict()
+
         # index of where in the `files` list to currently process.  Starts at -1, to allow the generator to advance
         # into the first file immediately.
         self._current_file_desc_idx = 0
@@ -110,16 +172,201 @@ class SplitFileReader(io.RawIOBase):
         # Value that `tell()` responds with.
         self._told = 0
 
+        # Cumulative offsets of the files, `_part_offsets[i]` is the offset of the first byte of `files[i]` and the
+        # last entry is the total size.  None when not in the index mode.
+        self._part_offsets: typing.Optional[typing.List[int]] = None
+        if part_sizes is not None or use_index or use_mmap or prefetch_blocks > 0:
+            self.build_index(part_sizes)
+
+        # Lazily created views of the memory-mapped files, None when not in the mmap mode.
+        self._part_views: typing.Optional[typing.List[typing.Optional[memoryview]]] = None
+        self._mmaps: typing.List[mmap.mmap] = []
+        if use_mmap:
+            if not all(isinstance(file, (str, os.PathLike)) for file in files):
+                raise ValueError("`use_mmap` requires all files to be paths.")
+            self._part_views = [None] * len(files)
+
+        # State of `pread`, shared by all threads calling it.  The lock guards the lazily opened files and the index,
+        # `os.pread` itself doesn't need it.
+        self._pread_lock = threading.Lock()
+        self._pread_fds: typing.Dict[int, int] = {}
+        self._pread_files: typing.Dict[int, typing.BinaryIO] = {}
+
+        # The prefetch thread is started on the first read and restarted on each seek, reads are then served from the
+        # current block, the file descriptor of this reader isn't used.
+        self._prefetch_blocks = prefetch_blocks
+        self._prefetch_block_size = prefetch_block_size
+        self._prefetcher: typing.Optional[_Prefetcher] = None
+        self._prefetch_block = memoryview(b"")
+
+        # Objects with a hashlib-like `update`, updated with the bytes read
+        self._hashers: typing.List[typing.Any] = []
+
         if validate_all_readable:
             self.test_all_readable()
 
+    def build_index(self, part_sizes: typing.Optional[typing.List[int]] = None) -> None:
+        """Switches to the index mode, measures the sizes of all files if `part_sizes` are not provided."""
+        if part_sizes is None:
+            part_sizes = [self._measure_part(file) for file in self._files]
+        if len(part_sizes) != len(self._files):
+            raise ValueError(f"Expected {len(self._files)} part sizes, got {len(part_sizes)}")
+
+        offsets = [0]
+        for size in part_sizes:
+            if size < 0:
+                raise ValueError(f"Part size can't be negative, got {size}")
+            offsets.append(offsets[-1] + size)
+        self._part_offsets = offsets
+
+    @staticmethod
+    def _measure_part(file: typing.Union[str, os.PathLike, typing.Any]) -> int:
+        if isinstance(file, (str, os.PathLike)):
+            return os.stat(file).st_size
+        # File-like, measure it without disturbing its position
+        position = file.tell()
+        size = file.seek(0, 2)
+        file.seek(position, 0)
+        return size
+
+    @property
+    def indexed(self) -> bool:
+        return self._part_offsets is not None
+
+    @property
+    def size(self) -> typing.Optional[int]:
+        """Total size of all files, None if not in the index mode"""
+        return self._part_offsets[-1] if self._part_offsets is not None else None
+
+    def _get_part_view(self, idx: int) -> memoryview:
+        view = self._part_views[idx]
+        if view is None:
+            if self._part_offsets[idx + 1] == self._part_offsets[idx]:
+                # Empty files can't be mapped
+                view = memoryview(b"")
+            else:
+                with open(self._files[idx], "rb") as f:
+                    mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self._mmaps.append(mapped)
+                view = memoryview(mapped)
+            self._part_views[idx] = view
+        return view
+
+    def view_range(self, offset: int, size: int) -> typing.List[memoryview]:
+        """Returns zero-copy views of `size` bytes starting at `offset`, one view for each file the range spans.
+
+        Only available in the mmap mode.  The range is clipped to the end of the last file.  Release the views before
+        closing the reader, the files can't be unmapped while they are referenced.
+        """
+        if self._part_views is None:
+            raise io.UnsupportedOperation("view_range is only available with `use_mmap`.")
+        if self.closed:
+            raise OSError("SplitFileReader is closed.")
+
+        offset = max(0, offset)
+        end = min(offset + size, self._part_offsets[-1])
+        views = []
+        idx = max(0, bisect.bisect_right(self._part_offsets, offset, 0, len(self._files)) - 1)
+        while offset < end:
+            part_start = self._part_offsets[idx]
+            part_end = self._part_offsets[idx + 1]
+            if part_end > offset:
+                view = self._get_part_view(idx)
+                views.append(view[offset - part_start : min(end, part_end) - part_start])
+                offset = min(end, part_end)
+            idx += 1
+        return views
+
+    def pread(self, offset: int, size: int) -> bytes:
+        """Reads up to `size` bytes at absolute `offset`, doesn't move the position of the reader.
+
+        Thread-safe, see the class docstring.  Builds the index on the first call if not in the index mode.  Returns
+        less than `size` bytes only at the end of the last file.
+        """
+        if offset < 0 or size < 0:
+            raise ValueError("`offset` and `size` can't be negative.")
+        if self.closed:
+            raise OSError("SplitFileReader is closed.")
+        if self._part_offsets is None:
+            with self._pread_lock:
+                if self._part_offsets is None:
+                    self.build_index()
+
+        offsets = self._part_offsets
+        end = min(offset + size, offsets[-1])
+        chunks = []
+        idx = max(0, bisect.bisect_right(offsets, offset, 0, len(self._files)) - 1)
+        while offset < end:
+            part_end = offsets[idx + 1]
+            if part_end > offset:
+                part_size = min(end, part_end) - offset
+                chunks.append(self._pread_file(idx, offset - offsets[idx], part_size))
+                offset += part_size
+            idx += 1
+        if len(chunks) == 1:
+            return chunks[0]
+        return b"".join(chunks)
+
+    def _pread_file(self, idx: int, position: int, size: int) -> bytes:
+        if self._part_views is not None:
+            with self._pread_lock:
+                view = self._get_part_view(idx)
+            return bytes(view[position : position + size])
+
+        file = self._files[idx]
+        if isinstance(file, (str, os.PathLike)) and _HAS_PREAD:
+            fd = self._pread_fds.get(idx, None)
+            if fd is None:
+                with self._pread_lock:
+                    fd = self._pread_fds.get(idx, None)
+                    if fd is None:
+                        fd = os.open(file, os.O_RDONLY)
+                        self._pread_fds[idx] = fd
+            chunks = []
+            while size > 0:
+                chunk = os.pread(fd, size, position)
+                if len(chunk) == 0:
+                    break
+                chunks.append(chunk)
+                position += len(chunk)
+                size -= len(chunk)
+            return chunks[0] if len(chunks) == 1 else b"".join(chunks)
+
+        # Without pread the seek and the read have to happen atomically
+        with self._pread_lock:
+            if isinstance(file, (str, os.PathLike)):
+                f = self._pread_files.get(idx, None)
+                if f is None:
+                    f = open(file, "rb")
+                    self._pread_files[idx] = f
+                f.seek(position, 0)
+                return f.read(size)
+            saved_position = file.tell()
+            try:
+                file.seek(position, 0)
+                return file.read(size)
+            finally:
+                file.seek(saved_position, 0)
+
+    def attach_hasher(self, hasher: typing.Any) -> typing.Any:
+        """Attaches `hasher`, e.g. `hashlib.sha256()` or `Crc32Hasher()`, returns it for convenience.
+
+        The hasher sees the bytes in the order they are read, so its digest is the digest of the whole data only if it
+        is attached at the start and everything is read sequentially.  `pread` doesn't update hashers.
+        """
+        self._hashers.append(hasher)
+        return hasher
+
+    def detach_hasher(self, hasher: typing.Any) -> None:
+        self._hashers.remove(hasher)
+
     def readable(self) -> bool:
         return True
 
     def readall(self) -> bytes:
         return self._read(-1, read_once=False)
 
-    def read1(self, size: typing.Optional[int] = None) -> typing.AnyStr:
+    def read1(self, size: typing.Optional[int] = None) -> bytes:
         """Read the specified amount, making underlying file boundaries invisible to the caller.
 
         If the current file pointer has been set to None, indicating an earlier call to `close()`, raises IOError.
@@ -132,62 +379,138 @@ class SplitFileReader(io.RawIOBase):
         else:
             return self._read(size, read_once=True)
 
-    def read(self, size: typing.Optional[int] = None) -> typing.AnyStr:
+    def read(self, size: typing.Optional[int] = None) -> bytes:
         """
         Read the specified amount, making underlying file boundaries invisible to the caller.
 
         If the current file pointer has been set to None, indicating an earlier call to `close()`, raises IOError.
 
         May make multiple system calls, but only one to each File Descriptor.
+
+        Use `readinto` to read into a buffer of the caller without copying the data.
         """
         if size is None or size < 0:
             return self.readall()
         else:
             return self._read(size)
 
-    def _read(self, target_size: int, read_once=False):
+    def _read(self, target_size: int, read_once=False) -> bytes:
         if not self._current_file_desc:
             raise OSError("SplitFileReader is closed.")
+        if self._part_offsets is not None:
+            # The size of the rest is known from the index, the buffer is never larger than that.
+            remaining = max(0, self._part_offsets[-1] - self._told)
+            if target_size < 0:
+                # Read -1/None makes a single read of all of it
+                target_size = remaining
+                read_once = False
+            else:
+                target_size = min(target_size, remaining)
         if target_size >= 0:
-            # file.read() may return zero-length data, even if only 1 byte is requested and there is actually more data.
-            # This is because the end of a single file may have been reached, and more files need to be opened.
-            ret = self._current_file_desc.read(target_size)
-            remaining = target_size - len(ret)
-            # Reads less than the total size are indicative that the end of a file has been reached, and the next one
-            # should be cycled in.
-            while remaining > 0:
-                if not self._safe_advance_file_desc(_FORWARD):
-                    # More requested to be read, but there are no more files to open.
-                    break
-                if read_once:
-                    # read1 calls only do a single filestream read, but file pointers still need to advance.
-                    break
-                read = self._current_file_desc.read(remaining)
-                remaining -= len(read)
-                ret += read
-            self._told += len(ret)
-        else:
-            # Read -1/None behaves differently.
-            ret = self._current_file_desc.read(target_size)
-            while self._safe_advance_file_desc(_FORWARD):
-                read = self._current_file_desc.read(target_size)
-                ret += read
-            self._told += len(ret)
+            # Built on `_readinto`, the parts are read straight into a single buffer instead of concatenating the
+            # data of each part.
+            buffer = bytearray(target_size)
+            read = self._readinto(buffer, read_once)
+            del buffer[read:]
+            return bytes(buffer)
+
+        # Read -1/None without the index, the size of the rest isn't known up front.
+        chunks = [self._current_file_desc.read(target_size)]
+        while self._safe_advance_file_desc(_FORWARD):
+            chunks.append(self._current_file_desc.read(target_size))
+        ret = b"".join(chunks)
+        self._told += len(ret)
+        for hasher in self._hashers:
+            hasher.update(ret)
         return ret
 
+    def _readinto_current_file(self, view: memoryview) -> int:
+        readinto = getattr(self._current_file_desc, "readinto", None)
+        if readinto is not None:
+            return readinto(view) or 0
+        # File-like objects without `readinto`
+        data = self._current_file_desc.read(len(view))
+        view[: len(data)] = data
+        return len(data)
+
+    def _readinto_next_files(self, view: memoryview, read_once: bool) -> int:
+        """Advances to the following files and fills `view` from them, returns the number of bytes read."""
+        read = 0
+        while read < len(view):
+            if not self._safe_advance_file_desc(_FORWARD):
+                # More requested to be read, but there are no more files to open.
+                break
+            if read_once:
+                # read1 calls only do a single filestream read, but file pointers still need to advance.
+                break
+            read += self._readinto_current_file(view[read:])
+        return read
+
+    def _readinto(self, buffer: typing.Any, read_once: bool) -> int:
+        """Fills `buffer` directly from the underlying files, part by part, without any intermediate copies."""
+        if not self._current_file_desc:
+            raise OSError("SplitFileReader is closed.")
+        with memoryview(buffer) as view, view.cast("B") as byte_view:
+            if self._prefetch_blocks > 0:
+                # Updates `_told` on its own
+                read = self._readinto_prefetched(byte_view, read_once)
+            else:
+                if self._part_views is not None:
+                    read = 0
+                    for part_view in self.view_range(self._told, len(byte_view)):
+                        byte_view[read : read + len(part_view)] = part_view
+                        read += len(part_view)
+                else:
+                    read = self._readinto_current_file(byte_view)
+                    if read < len(byte_view):
+                        read += self._readinto_next_files(byte_view[read:], read_once)
+                self._told += read
+            for hasher in self._hashers:
+                hasher.update(byte_view[:read])
+        return read
+
+    def _next_prefetched(self, size: int) -> memoryview:
+        """Returns up to `size` bytes of the current prefetched block, empty at the end of the last file."""
+        if len(self._prefetch_block) == 0:
+            if self._prefetcher is None:
+                self._prefetcher = _Prefetcher(
+                    self._files,
+                    self._part_offsets,
+                    self._told,
+                    self._prefetch_block_size,
+                    self._prefetch_blocks,
+                )
+            self._prefetch_block = memoryview(self._prefetcher.get())
+        ret = self._prefetch_block[:size]
+        self._prefetch_block = self._prefetch_block[len(ret) :]
+        self._told += len(ret)
+        return ret
+
+    def _readinto_prefetched(self, view: memoryview, read_once: bool) -> int:
+        read = 0
+        while read < len(view):
+            chunk = self._next_prefetched(len(view) - read)
+            if len(chunk) == 0:
+                break
+            view[read : read + len(chunk)] = chunk
+            read += len(chunk)
+            if read_once:
+                break
+        return read
+
+    def _stop_prefetch(self) -> None:
+        if self._prefetcher is not None:
+            self._prefetcher.stop()
+            self._prefetcher = None
+        self._prefetch_block = memoryview(b"")
+
     def readinto(self, buffer: bytearray) -> typing.Optional[int]:
-        """This is the copy/paste implementation of `io.FileIO.readinto()`"""
-        data = self._read(len(buffer), read_once=False)
-        n = len(data)
-        buffer[:n] = data
-        return n
+        """Reads into the caller's `buffer` without copying, may cross file boundaries"""
+        return self._readinto(buffer, read_once=False)
 
     def readinto1(self, buffer: bytearray) -> typing.Optional[int]:
-        """This is the copy/paste implementation of `io.FileIO.readinto()`"""
-        data = self._read(len(buffer), read_once=True)
-        n = len(data)
-        buffer[:n] = data
-        return n
+        """Reads into the caller's `buffer` without copying, makes at most one read from the underlying files"""
+        return self._readinto(buffer, read_once=True)
 
     def seekable(self) -> bool:
         return not self._stream_only
@@ -214,6 +537,18 @@ class SplitFileReader(io.RawIOBase):
         if not self._current_file_desc:
             raise OSError("SplitFileReader is closed.")
 
+        if self._part_offsets is not None:
+            if whence == 0:
+                target = offset
+            elif whence == 1:
+                target = self._told + offset
+            elif whence == 2:  # noqa: PLR2004
+                target = self._part_offsets[-1] + offset
+            else:
+                raise IndexError("Whence must be 0, 1, or 2")
+            self._seek_indexed(target)
+            return self.tell()
+
         if whence == 0:
             # From the start
             # Do not always immediately `_seek_to_head`, and then scan forward the offset.  There are many libraries
@@ -254,6 +589,31 @@ class SplitFileReader(io.RawIOBase):
             raise IndexError("Whence must be 0, 1, or 2")
         return self.tell()
 
+    def _seek_indexed(self, target: int) -> None:
+        # Same as in the scanning mode, seeking before the start stops at the start and seeking beyond the end
+        # of the last file is allowed.
+        target = max(0, target)
+        if target == self._told:
+            return
+        if self._prefetch_blocks > 0:
+            # The blocks read ahead are of no use, the thread is started again at the new position on the next read
+            self._stop_prefetch()
+            self._told = target
+            return
+        if self._part_views is not None:
+            # Reads are served from the mapped views, the file descriptor isn't used
+            self._told = target
+            return
+
+        # bisect_right skips empty files starting at the same offset, reading continues from the last of them
+        idx = bisect.bisect_right(self._part_offsets, target, 0, len(self._files)) - 1
+        idx = max(0, idx)
+        if idx != self._current_file_desc_idx:
+            self._current_file_desc_idx = idx
+            self._current_file_desc = self._file_desc_generator.send(_STATIONARY)
+        self._current_file_desc.seek(target - self._part_offsets[idx], 0)
+        self._told = target
+
     def _scan_forward(self, offset: int) -> None:
         # Forward seeking is tricky; it is possible to seek beyond the end of a file, even in read-only mode.  So seek
         # immediately to the end of the current file descriptor, and check the distance moved.  If moved too far, back up
@@ -389,7 +749,7 @@ class SplitFileReader(io.RawIOBase):
         # Only create in `__init__`
         # `send()` the direction of travel to this generator.  Backward -1, Stationary 0, Forward 1, or Closing 2.
         # This can raise a `FileNotFoundError`, and as such may propagate up through `seek` or `read`
-        # Using this generator allows the context manager to open and close the file pointers automatically when required.
+        # Files given as paths come from the pool of open files, `close` closes them.
 
         while True:
             self._current_file_desc_idx += direction
@@ -407,10 +767,8 @@ class SplitFileReader(io.RawIOBase):
                     # No, it's a filename
                     self._filePassed = 0
                     self.filename = file
-                    with open(file, "rb") as self._current_file_desc:
-                        logger.info(f"Opening new fd on {file}.")
-                        direction = yield self._current_file_desc
-                        logger.info(f"Closing fd on {file}.")
+                    self._current_file_desc = self._get_open_file(self._current_file_desc_idx, file)
+                    direction = yield self._current_file_desc
                 else:
                     # No, its (probably) already file-like.
                     self._current_file_desc = file
@@ -418,6 +776,28 @@ class SplitFileReader(io.RawIOBase):
                     direction = yield self._current_file_desc
                     logger.info(f"Passthrough file-like done {file}.")
 
+    def _get_open_file(self, idx: int, file: str) -> typing.BinaryIO:
+        """Returns the file at `idx` from the pool of open files, opens it and closes the least recently used if needed."""
+        f = self._open_files.get(idx, None)
+        if f is not None:
+            self._open_files.move_to_end(idx)
+            return f
+
+        while len(self._open_files) >= self._max_open_files:
+            evicted_idx, evicted = self._open_files.popitem(last=False)
+            logger.info(f"Closing fd on {self._files[evicted_idx]}.")
+            evicted.close()
+        logger.info(f"Opening new fd on {file}.")
+        f = open(file, "rb")
+        self._open_files[idx] = f
+        return f
+
+    def _close_open_files(self) -> None:
+        while len(self._open_files) > 0:
+            idx, f = self._open_files.popitem(last=False)
+            logger.info(f"Closing fd on {self._files[idx]}.")
+            f.close()
+
     def test_all_readable(self):
         """Validate every file in the `files` parameter at `__init__` is actually readable.
 
@@ -455,6 +835,27 @@ class SplitFileReader(io.RawIOBase):
         logger.info("Closing last file descriptor.")
         self._file_desc_generator.close()
         self._current_file_desc = None
+        self._close_open_files()
+        self._stop_prefetch()
+        with self._pread_lock:
+            for fd in self._pread_fds.values():
+                os.close(fd)
+            self._pread_fds.clear()
+            for f in self._pread_files.values():
+                f.close()
+            self._pread_files.clear()
+        if self._part_views is not None:
+            for view in self._part_views:
+                if view is not None:
+                    view.release()
+            self._part_views = [None] * len(self._files)
+            for mapped in self._mmaps:
+                try:
+                    mapped.close()
+                except BufferError:
+                    # The caller still holds views from `view_range`, the mapping is closed once they are released
+                    logger.debug("Can't unmap a file, views of it are still referenced.")
+            self._mmaps = []
 
     @property
     def closed(self) -> bool:
@@ -551,3 +952,285 @@ class SplitFileReader(io.RawIOBase):
         raise io.UnsupportedOperation(
             f"{self.__class__.__name__} cannot decode text; use io.TextIOWrapper."
         )
+
+
+class Crc32Hasher:
+    """zlib.crc32 with the hashlib interface, the checksum zip uses for its members"""
+
+    name = "crc32"
+    digest_size = 4
+
+    def __init__(self, data: bytes = b""):
+        self.value = zlib.crc32(data)
+
+    def update(self, data: typing.Any) -> None:
+        self.value = zlib.crc32(data, self.value)
+
+    def digest(self) -> bytes:
+        return self.value.to_bytes(4, "big")
+
+    def hexdigest(self) -> str:
+        return f"{self.value:08x}"
+
+    def copy(self) -> "Crc32Hasher":
+        ret = Crc32Hasher()
+        ret.value = self.value
+        return ret
+
+
+def new_hasher(algorithm: str) -> typing.Any:
+    """Returns a new hasher for `algorithm`, "crc32" or any name `hashlib.new` accepts"""
+    if algorithm == "crc32":
+        return Crc32Hasher()
+    return hashlib.new(algorithm)
+
+
+# Size of the chunks parts are hashed in by `verify_parts`
+_VERIFY_CHUNK_SIZE = 1024 * 1024
+
+
+def _hash_part(path: typing.Union[str, os.PathLike], algorithm: str) -> str:
+    hasher = new_hasher(algorithm)
+    buffer = bytearray(_VERIFY_CHUNK_SIZE)
+    with open(path, "rb") as f, memoryview(buffer) as view:
+        while True:
+            read = f.readinto(buffer)
+            if read == 0:
+                break
+            hasher.update(view[:read])
+    return hasher.hexdigest()
+
+
+def verify_parts(
+    files: typing.List[typing.Union[str, os.PathLike]],
+    digests: typing.List[str],
+    algorithm: str = "sha256",
+    workers: int = 4,
+) -> typing.List[int]:
+    """Hashes `files` in `workers` threads and compares them with the expected hex `digests` in the same order.
+
+    Returns indices of the corrupted files, those which don't match their digest or can't be read, empty if all of
+    them are fine.  Hashing releases the GIL, so the files are read and hashed in parallel.
+    """
+    if len(digests) != len(files):
+        raise ValueError(f"Expected {len(files)} digests, got {len(digests)}")
+
+    def verify(idx: int) -> bool:
+        try:
+            return _hash_part(files[idx], algorithm) == digests[idx].lower()
+        except OSError as e:
+            logger.warning(f"Can't read {files[idx]} to verify it: {e}")
+            return False
+
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=max(1, workers), thread_name_prefix="split_file_verify"
+    ) as executor:
+        results = list(executor.map(verify, range(len(files))))
+
+    corrupted = [idx for idx, ok in enumerate(results) if not ok]
+    for idx in corrupted:
+        logger.error(f"Part {idx} ({files[idx]}) doesn't match its {algorithm} digest.")
+    return corrupted
+
+
+class _Prefetcher:
+    """Reads blocks starting at `offset` in a background thread, until `depth` blocks wait for the consumer."""
+
+    def __init__(
+        self,
+        files: typing.List[typing.Union[str, os.PathLike]],
+        part_offsets: typing.List[int],
+        offset: int,
+        block_size: int,
+        depth: int,
+    ):
+        self._queue: queue.Queue = queue.Queue(maxsize=depth)
+        self._stop = threading.Event()
+        # Set once the consumer got the last block or an error, following `get` calls repeat it.
+        self._last: typing.Optional[typing.Union[bytes, BaseException]] = None
+        part_sizes = [end - start for start, end in zip(part_offsets, part_offsets[1:])]
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(files, part_sizes, offset, block_size),
+            name="split_file_prefetch",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def _run(
+        self,
+        files: typing.List[typing.Union[str, os.PathLike]],
+        part_sizes: typing.List[int],
+        offset: int,
+        block_size: int,
+    ) -> None:
+        try:
+            # Two open files are enough, the next file is opened while the previous one is still being read
+            with SplitFileReader(files, part_sizes=part_sizes, max_open_files=2) as reader:
+                reader.seek(offset, 0)
+                while not self._stop.is_set():
+                    block = reader.read(block_size)
+                    self._put(block)
+                    if len(block) == 0:
+                        break
+        except BaseException as e:
+            self._put(e)
+
+    def _put(self, item: typing.Union[bytes, BaseException]) -> None:
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def get(self) -> bytes:
+        """Returns the next block, empty at the end of the last file, raises errors of the background thread."""
+        item = self._last if self._last is not None else self._queue.get()
+        if isinstance(item, BaseException):
+            self._last = item
+            raise item
+        if len(item) == 0:
+            self._last = item
+        return item
+
+    def stop(self) -> None:
+        self._stop.set()
+        # Wakes up the thread if it waits for a free slot
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+        self._thread.join()
+
+
+# Size of the chunks members are decompressed and written in by `extract_split_zip`
+_EXTRACT_CHUNK_SIZE = 1024 * 1024
+
+
+# Characters not allowed in Windows file names, replaced by "_" the same way as in `zipfile`
+_WINDOWS_ILLEGAL_NAME_CHARACTERS = str.maketrans(':<>|"?*', "_" * 7)
+
+
+def _get_member_target_path(destination: str, member: zipfile.ZipInfo) -> str:
+    """Returns where to extract `member`, sanitized the same way as in `zipfile.ZipFile.extract`."""
+    arcname = member.filename.replace("/", os.path.sep)
+    if os.path.altsep:
+        arcname = arcname.replace(os.path.altsep, os.path.sep)
+    # Interpret absolute paths as relative, remove drive letters, UNC paths, "." and ".." components.
+    arcname = os.path.splitdrive(arcname)[1]
+    invalid_path_parts = ("", os.path.curdir, os.path.pardir)
+    arcname = os.path.sep.join(x for x in arcname.split(os.path.sep) if x not in invalid_path_parts)
+    if os.path.sep == "\\":
+        # Windows doesn't allow some characters nor trailing dots in names
+        parts = (
+            x.translate(_WINDOWS_ILLEGAL_NAME_CHARACTERS).rstrip(".")
+            for x in arcname.split(os.path.sep)
+        )
+        arcname = os.path.sep.join(x for x in parts if x)
+    return os.path.normpath(os.path.join(destination, arcname))
+
+
+def extract_split_zip(
+    files: typing.List[typing.Union[str, os.PathLike]],
+    destination: str,
+    workers: int = 4,
+    members: typing.Optional[typing.Iterable[str]] = None,
+) -> typing.List[str]:
+    """Extracts a zip split into `files` to `destination`, decompressing members in `workers` threads.
+
+    Each worker opens its own `zipfile.ZipFile` over its own `SplitFileReader`, sharing the part index measured
+    once, and reads members through `ZipFile.open`.  Decompression and file writes release the GIL, so threads scale
+    well.  The output is the same as with `zipfile.ZipFile.extractall`: paths are sanitized and when names repeat, the
+    last member wins.  On the first error the remaining members are not extracted, the partially written member is
+    removed and the error is raised.
+
+    Returns the extracted paths in the order of the central directory.
+    """
+    with SplitFileReader(files, use_index=True) as reader:
+        part_sizes = [
+            end - start for start, end in zip(reader._part_offsets, reader._part_offsets[1:])
+        ]
+        with zipfile.ZipFile(reader) as archive:
+            infos = archive.infolist()
+
+    if members is not None:
+        wanted = set(members)
+        infos = [info for info in infos if info.filename in wanted]
+
+    # Later members overwrite the earlier ones with the same target path, keep just the last one for determinism.
+    targets: typing.Dict[str, zipfile.ZipInfo] = {}
+    for info in infos:
+        targets[_get_member_target_path(destination, info)] = info
+    ordered_targets = list(targets.items())
+
+    # Create all directories upfront, workers then only write files.
+    for target_path, info in ordered_targets:
+        directory = target_path if info.is_dir() else os.path.dirname(target_path)
+        os.makedirs(directory, exist_ok=True)
+
+    stop = threading.Event()
+    local = threading.local()
+    opened: typing.List[typing.Tuple[zipfile.ZipFile, SplitFileReader]] = []
+    opened_lock = threading.Lock()
+
+    def get_archive() -> zipfile.ZipFile:
+        archive = getattr(local, "archive", None)
+        if archive is None:
+            reader = SplitFileReader(files, part_sizes=part_sizes)
+            try:
+                archive = zipfile.ZipFile(reader)
+            except:
+                reader.close()
+                raise
+            local.archive = archive
+            with opened_lock:
+                opened.append((archive, reader))
+        return archive
+
+    def extract(target_path: str, info: zipfile.ZipInfo) -> None:
+        if stop.is_set():
+            return
+        interrupted = False
+        try:
+            with get_archive().open(info) as source, open(target_path, "wb") as target:
+                while True:
+                    if stop.is_set():
+                        interrupted = True
+                        break
+                    chunk = source.read(_EXTRACT_CHUNK_SIZE)
+                    if len(chunk) == 0:
+                        break
+                    target.write(chunk)
+        except BaseException:
+            stop.set()
+            if os.path.isfile(target_path):
+                os.remove(target_path)
+            raise
+        if interrupted:
+            # Another member failed, its error is raised, don't leave this one truncated.
+            os.remove(target_path)
+
+    try:
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=max(1, workers), thread_name_prefix="split_zip_extract"
+        ) as executor:
+            futures = [
+                executor.submit(extract, target_path, info)
+                for target_path, info in ordered_targets
+                if not info.is_dir()
+            ]
+            for future in concurrent.futures.as_completed(futures):
+                error = future.exception()
+                if error is not None:
+                    stop.set()
+                    for other in futures:
+                        other.cancel()
+                    raise error
+    finally:
+        for archive, reader in opened:
+            archive.close()
+            reader.close()
+
+    return [target_path for target_path, _ in ordered_targets]
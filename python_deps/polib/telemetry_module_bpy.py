@@ -3,25 +3,41 @@
 
 import bpy
 import addon_utils
+import atexit
+import collections
 import datetime
 import functools
 import hashlib
+import heapq
 import json
 import multiprocessing
 import os
 import platform
 import socket
+import sys
+import tempfile
+import time
 import traceback
 import typing
 import uuid
 import enum
 import threading
 import logging
+from . import timers_bpy
 
 logger = logging.getLogger(f"polygoniq.{__name__}")
 
 
-API_VERSION = 2
+if "STREAM_WRITER" in globals():
+    # The module is being reloaded, stop the writer thread of the previous instance. It has to be
+    # done before the classes are redefined, the pending messages are instances of the old ones.
+    STREAM_WRITER.close()
+
+
+# Bump on any change of the public interface, add-ons sharing telemetry through
+# bpy.polygoniq_global only share an instance of the same API version.
+# 3: MessageBuffer instead of a list in MESSAGES, aggregated messages, TelemetryWrapper.flush
+API_VERSION = 3
 
 # useful for debugging
 PRINT_MESSAGES = False
@@ -30,7 +46,15 @@ BOOTSTRAPPED = False
 BOOTSTRAP_LOCK = threading.Lock()
 SESSION = None
 MACHINE = None
-MESSAGES = []
+# Telemetry is kept for the whole Blender session which can last for days, the storage is bounded.
+# Estimated size of messages is used for the budget, see '_estimate_size'.
+MAX_MESSAGES = 2000
+MAX_MESSAGES_BYTES = 4 * 1024 * 1024
+# All messages are streamed to this file, it is rotated once it grows over the limit
+STREAM_FILE_PATH = os.path.join(tempfile.gettempdir(), "polygoniq_logs", "telemetry.jsonl")
+STREAM_FILE_MAX_BYTES = 8 * 1024 * 1024
+STREAM_FILE_BACKUP_COUNT = 2
+STREAM_FLUSH_INTERVAL = 2.0
 
 
 class VerboseLevel(enum.IntEnum):
@@ -56,8 +80,37 @@ class Session:
         self.start_timestamp = datetime.datetime.utcnow().isoformat()
 
 
+# Strict timeout for the probes that can block while collecting the machine info, e.g. resolving
+# the hostname can take seconds on offline or badly configured networks.
+MACHINE_PROBE_TIMEOUT = 2.0
+
+
+def _call_with_timeout(
+    fn: typing.Callable[[], typing.Any], timeout: float, default: typing.Any = "N/A"
+) -> typing.Any:
+    """Runs 'fn' in a daemon thread, returns 'default' if it fails or doesn't finish in time"""
+    result = [default]
+
+    def _run():
+        try:
+            result[0] = fn()
+        except:
+            pass
+
+    thread = threading.Thread(target=_run, name="polib_telemetry_probe", daemon=True)
+    thread.start()
+    thread.join(timeout)
+    return result[0] if not thread.is_alive() else default
+
+
 class Machine:
-    def __init__(self):
+    """Information about the machine Blender runs on.
+
+    Construction can take up to a few seconds, don't construct this on the main thread.
+    Blender related info has to be collected on the main thread, see 'get_blender_info'.
+    """
+
+    def __init__(self, blender: typing.Optional[typing.Dict[str, typing.Any]] = None):
         def safe_get(fn, default="N/A"):
             """Run given functor to retrieve data. Catch all exceptions and provide
             a default value in case of failure.
@@ -67,19 +120,29 @@ class Machine:
             except:
                 return default
 
-        self._uuid = uuid.UUID(int=uuid.getnode()).hex
+        def safe_get_blocking(fn, default="N/A"):
+            """Same as 'safe_get' for functors that can block, gives up after the timeout"""
+            return _call_with_timeout(fn, MACHINE_PROBE_TIMEOUT, default)
+
+        # getnode can run external tools to find the MAC address
+        self._uuid = safe_get_blocking(lambda: uuid.UUID(int=uuid.getnode()).hex)
 
         self.hardware = {
             "architecture": platform.machine(),
-            "processor": platform.processor(),
+            "processor": safe_get(lambda: platform.processor()),
             "cpu_count": multiprocessing.cpu_count(),
         }
 
         self.operating_system = (platform.system(), platform.release(), platform.version())
 
+        hostname = safe_get(lambda: socket.gethostname())
         self.networking = {
-            "hostname": safe_get(lambda: socket.gethostname()),
-            "ip-address": safe_get(lambda: socket.gethostbyname(socket.gethostname())),
+            "hostname": hostname,
+            "ip-address": (
+                safe_get_blocking(lambda: socket.gethostbyname(hostname))
+                if hostname != "N/A"
+                else "N/A"
+            ),
             "has-ipv6": socket.has_ipv6,
         }
 
@@ -88,7 +151,11 @@ class Machine:
             "build": platform.python_build(),
         }
 
-        self.blender = {
+        self.blender = blender if blender is not None else Machine.get_blender_info()
+
+    @staticmethod
+    def get_blender_info() -> typing.Dict[str, typing.Any]:
+        return {
             "version": bpy.app.version_string,
             "path": bpy.app.binary_path,
             "window_size": Machine.get_blender_window_size(),
@@ -156,6 +223,18 @@ class MessageType:
     WARNING_MESSAGE = "warning_message"
     ERROR_MESSAGE = "error_message"
     DEBUG_MESSAGE = "debug_message"
+    # summary of messages evicted from the bounded storage, added when dumping
+    MESSAGES_DROPPED = "messages_dropped"
+
+
+# These are logged once per session or addon and are needed to make sense of the other messages,
+# they are never evicted and don't count towards the storage limits.
+PINNED_MESSAGE_TYPES = {
+    MessageType.SESSION_STARTED,
+    MessageType.MACHINE_REGISTERED,
+    MessageType.ADDON_REPORTED,
+    MessageType.ALL_ADDONS_REPORTED,
+}
 
 
 class Message:
@@ -179,6 +258,71 @@ class Message:
         self.product = product
 
 
+# (filename, line number, function name) of each frame, from the outermost one
+StackFingerprint = typing.Tuple[typing.Tuple[str, int, str], ...]
+
+
+def _capture_stack(skip: int = 0) -> StackFingerprint:
+    """Returns fingerprint of the caller's stack, 'skip' drops the innermost frames.
+
+    This is way cheaper than traceback.extract_stack, nothing is formatted and no source lines
+    are read. Use '_format_stack' to get the same output as traceback.extract_stack().format().
+    """
+    frames = []
+    frame = sys._getframe(skip + 1)
+    while frame is not None:
+        code = frame.f_code
+        frames.append((code.co_filename, frame.f_lineno, code.co_name))
+        frame = frame.f_back
+    frames.reverse()
+    return tuple(frames)
+
+
+def _format_stack(stack: StackFingerprint) -> typing.List[str]:
+    return traceback.StackSummary.from_list(
+        [(filename, lineno, name, None) for filename, lineno, name in stack]
+    ).format()
+
+
+class AggregatedMessage(Message):
+    """Message logged repeatedly from the same call site, stored only once.
+
+    The stack is kept as a fingerprint and formatted only when the message is serialized.
+    """
+
+    def __init__(self, type: str, text: str, stack: StackFingerprint, product: str = "unknown"):
+        super().__init__(type, data=None, product=product)
+        self.count = 1
+        self.first_message = text
+        self.last_message = text
+        self._first_seen_time = time.time()
+        self._last_seen_time = self._first_seen_time
+        self._stack = stack
+        self._formatted_stack: typing.Optional[typing.List[str]] = None
+
+    def hit(self, text: str) -> None:
+        self.count += 1
+        self.last_message = text
+        self._last_seen_time = time.time()
+
+    def as_dict(self) -> typing.Dict[str, typing.Any]:
+        if self._formatted_stack is None:
+            self._formatted_stack = _format_stack(self._stack)
+
+        return {
+            "_session_uuid": self._session_uuid,
+            "_timestamp": self._timestamp,
+            "_type": self._type,
+            # same format as messages logged before the aggregation
+            "data": [self.first_message] + self._formatted_stack,
+            "product": self.product,
+            "count": self.count,
+            "first_seen": datetime.datetime.utcfromtimestamp(self._first_seen_time).isoformat(),
+            "last_seen": datetime.datetime.utcfromtimestamp(self._last_seen_time).isoformat(),
+            "last_message": self.last_message,
+        }
+
+
 class PrivateWrapper:
     """Used to wrap private data such as object names in a way that can be recovered
     locally but is hidden when telemetry is sent remotely.
@@ -207,6 +351,11 @@ class TelemetryJSONEncoder(json.JSONEncoder):
             altered_dict["__class__"] = "telemetry.Session"
             return altered_dict
 
+        elif isinstance(obj, AggregatedMessage):
+            altered_dict = obj.as_dict()
+            altered_dict["__class__"] = "telemetry.AggregatedMessage"
+            return altered_dict
+
         elif isinstance(obj, Message):
             altered_dict = obj.__dict__.copy()
             altered_dict["__class__"] = "telemetry.Message"
@@ -226,6 +375,274 @@ class RemoteTelemetryJSONEncoder(TelemetryJSONEncoder):
         return TelemetryJSONEncoder.default(self, obj)
 
 
+def _estimate_size(obj: typing.Any, depth: int = 0) -> int:
+    """Returns rough size of 'obj' once serialized, way cheaper than actually serializing it"""
+    if isinstance(obj, str):
+        return len(obj) + 2
+    if obj is None or isinstance(obj, (bool, int, float)):
+        return 8
+    # Deeper structures are rare in telemetry, we don't want to spend time walking them
+    if depth >= 4:
+        return 64
+    if isinstance(obj, (list, tuple)):
+        return 2 + sum(_estimate_size(item, depth + 1) + 2 for item in obj)
+    if isinstance(obj, dict):
+        return 2 + sum(
+            _estimate_size(key, depth + 1) + _estimate_size(value, depth + 1) + 4
+            for key, value in obj.items()
+        )
+    if isinstance(obj, PrivateWrapper):
+        return len(obj.value) + 2
+    if hasattr(obj, "__dict__"):
+        return _estimate_size(obj.__dict__, depth + 1)
+    return 64
+
+
+class MessageBuffer:
+    """Bounded storage of telemetry messages.
+
+    The oldest messages are evicted once there are more than 'max_count' of them or once their
+    estimated size exceeds 'max_bytes'. Messages of PINNED_MESSAGE_TYPES are kept forever.
+    Number of evicted messages is tracked per message type. Callbacks in 'on_evict' are called
+    with each evicted message while 'lock' is held.
+    """
+
+    def __init__(self, max_count: int, max_bytes: int):
+        self.max_count = max_count
+        self.max_bytes = max_bytes
+        self.lock = threading.RLock()
+        self.on_evict: typing.List[typing.Callable[[Message], None]] = []
+        # (sequence number, message, estimated size), sequence number preserves the logging order
+        # across the pinned and the evictable messages
+        self._pinned: typing.List[typing.Tuple[int, Message, int]] = []
+        self._messages: typing.Deque[typing.Tuple[int, Message, int]] = collections.deque()
+        self._next_seq = 0
+        self._bytes = 0
+        self._dropped: typing.Dict[str, int] = collections.defaultdict(int)
+
+    def append(self, msg: Message) -> None:
+        with self.lock:
+            entry = (self._next_seq, msg, _estimate_size(msg))
+            self._next_seq += 1
+            if msg._type in PINNED_MESSAGE_TYPES:
+                self._pinned.append(entry)
+                return
+
+            self._messages.append(entry)
+            self._bytes += entry[2]
+            # Always keep the latest message even if it alone exceeds the byte budget
+            while len(self._messages) > 1 and (
+                len(self._messages) > self.max_count or self._bytes > self.max_bytes
+            ):
+                self._evict_oldest()
+
+    def _evict_oldest(self) -> None:
+        _, evicted, size = self._messages.popleft()
+        self._bytes -= size
+        self._dropped[evicted._type] += 1
+        for callback in self.on_evict:
+            try:
+                callback(evicted)
+            except:
+                logger.exception(f"Uncaught exception in telemetry eviction callback {callback}")
+
+    def snapshot(self) -> typing.List[Message]:
+        """Returns all stored messages in the order they were logged"""
+        with self.lock:
+            return [
+                entry[1]
+                for entry in heapq.merge(self._pinned, self._messages, key=lambda entry: entry[0])
+            ]
+
+    def get_dropped_summary(self) -> typing.Optional[typing.Dict[str, typing.Any]]:
+        """Returns summary of evicted messages or None if no message was evicted yet"""
+        with self.lock:
+            if len(self._dropped) == 0:
+                return None
+            return {
+                "dropped": dict(self._dropped),
+                "dropped_total": sum(self._dropped.values()),
+                "max_count": self.max_count,
+                "max_bytes": self.max_bytes,
+            }
+
+    @property
+    def estimated_bytes(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        with self.lock:
+            return len(self._pinned) + len(self._messages)
+
+    def __iter__(self) -> typing.Iterator[Message]:
+        return iter(self.snapshot())
+
+
+MESSAGES = MessageBuffer(MAX_MESSAGES, MAX_MESSAGES_BYTES)
+
+# (type, product, stack fingerprint) -> message, guarded by MESSAGES.lock
+AGGREGATED_MESSAGES: typing.Dict[
+    typing.Tuple[str, str, StackFingerprint], AggregatedMessage
+] = {}
+
+
+def _forget_aggregated_message(msg: Message) -> None:
+    if not isinstance(msg, AggregatedMessage):
+        return
+    key = (msg._type, msg.product, msg._stack)
+    if AGGREGATED_MESSAGES.get(key) is msg:
+        del AGGREGATED_MESSAGES[key]
+
+
+MESSAGES.on_evict.append(_forget_aggregated_message)
+
+
+class TelemetryStreamWriter:
+    """Appends telemetry messages to a JSONL file, one compact JSON object per line.
+
+    Messages are serialized and written by a background thread so logging never waits for disk.
+    Messages changed after they were logged are marked dirty and written once more with their
+    current state on the next flush. Readers should keep the last line of such messages.
+
+    Aggregated messages change with every hit and serializing them formats their stack, they are
+    not written by the periodic flushes. They are written by explicit 'flush' calls - when
+    packing logs and on exit - and once they are evicted from MESSAGES.
+
+    The file is rotated when it exceeds 'max_bytes', keeping 'backup_count' older files with
+    .1, .2, ... suffixes.
+    """
+
+    def __init__(self, path: str, max_bytes: int, backup_count: int, flush_interval: float):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.flush_interval = flush_interval
+        # Guards '_pending', '_dirty' and '_aggregated', never held while serializing or writing
+        self._lock = threading.Lock()
+        # Serializes the flushes from the background thread, pack_logs and atexit
+        self._write_lock = threading.Lock()
+        self._pending: typing.List[Message] = []
+        # id -> message, dict keeps the order in which the messages were changed
+        self._dirty: typing.Dict[int, Message] = {}
+        # id -> aggregated message logged or changed since the last explicit flush
+        self._aggregated: typing.Dict[int, AggregatedMessage] = {}
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: typing.Optional[threading.Thread] = None
+
+    def enqueue(self, msg: Message) -> None:
+        with self._lock:
+            if isinstance(msg, AggregatedMessage):
+                self._aggregated[id(msg)] = msg
+            else:
+                self._pending.append(msg)
+
+    def mark_dirty(self, msg: Message) -> None:
+        with self._lock:
+            if isinstance(msg, AggregatedMessage):
+                self._aggregated[id(msg)] = msg
+            else:
+                self._dirty[id(msg)] = msg
+
+    def enqueue_evicted(self, msg: Message) -> None:
+        """Writes the final state of an aggregated message evicted from MESSAGES"""
+        if not isinstance(msg, AggregatedMessage):
+            return
+        with self._lock:
+            self._aggregated.pop(id(msg), None)
+            self._pending.append(msg)
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._run, name="polib_telemetry_writer", daemon=True
+        )
+        self._thread.start()
+        atexit.register(self.close)
+
+    def close(self) -> None:
+        """Stops the background thread and writes all messages"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        atexit.unregister(self.close)
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self._write(include_aggregated=False)
+
+    def flush(self) -> None:
+        """Writes all pending, dirty and aggregated messages, blocks until they are on disk"""
+        self._write(include_aggregated=True)
+
+    def _write(self, include_aggregated: bool) -> None:
+        with self._write_lock:
+            with self._lock:
+                pending, self._pending = self._pending, []
+                dirty, self._dirty = self._dirty, {}
+                aggregated: typing.Dict[int, AggregatedMessage] = {}
+                if include_aggregated:
+                    aggregated, self._aggregated = self._aggregated, {}
+
+            # Messages logged and changed since the last flush are written just once
+            pending_ids = {id(msg) for msg in pending}
+            messages = pending + [msg for key, msg in dirty.items() if key not in pending_ids]
+            messages.extend(msg for key, msg in aggregated.items() if key not in pending_ids)
+            if len(messages) == 0:
+                return
+
+            lines = []
+            for msg in messages:
+                try:
+                    lines.append(
+                        json.dumps(msg, separators=(",", ":"), cls=TelemetryJSONEncoder) + "\n"
+                    )
+                except:
+                    logger.exception(f"Can't serialize telemetry message of type {msg._type}")
+            chunk = "".join(lines)
+
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                self._rotate_if_needed(len(chunk))
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(chunk)
+            except:
+                logger.exception(f"Can't write telemetry to {self.path}")
+
+    def _rotate_if_needed(self, incoming_bytes: int) -> None:
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return
+        if size == 0 or size + incoming_bytes <= self.max_bytes:
+            return
+
+        for i in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{i}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{i + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+    def get_file_paths(self) -> typing.List[str]:
+        """Returns paths of the stream file and its existing backups"""
+        paths = [self.path] + [f"{self.path}.{i}" for i in range(1, self.backup_count + 1)]
+        return [path for path in paths if os.path.isfile(path)]
+
+
+STREAM_WRITER = TelemetryStreamWriter(
+    STREAM_FILE_PATH, STREAM_FILE_MAX_BYTES, STREAM_FILE_BACKUP_COUNT, STREAM_FLUSH_INTERVAL
+)
+MESSAGES.on_evict.append(STREAM_WRITER.enqueue_evicted)
+
+
 def _log(msg: Message) -> None:
     global SESSION
     global MESSAGES
@@ -235,19 +652,31 @@ def _log(msg: Message) -> None:
         msg._session_uuid = SESSION._uuid
 
     MESSAGES.append(msg)
+    STREAM_WRITER.enqueue(msg)
     if PRINT_MESSAGES:
         print(json.dumps(msg, indent=4, sort_keys=True, cls=TelemetryJSONEncoder))
 
 
 def log_installed_addons() -> None:
-    global MACHINE
-    assert MACHINE is not None, "logging before telemetry has been bootstrapped!"
+    global SESSION
+    assert SESSION is not None, "logging before telemetry has been bootstrapped!"
 
     _log(
         Message(MessageType.ALL_ADDONS_REPORTED, data=Machine.get_blender_addons(), product="polib")
     )
 
 
+def _register_machine(message: Message, blender: typing.Dict[str, typing.Any]) -> None:
+    global MACHINE
+
+    machine = Machine(blender)
+    # The message is already logged, it's updated under the lock like the aggregated messages
+    with MESSAGES.lock:
+        MACHINE = machine
+        message.data = machine
+        STREAM_WRITER.mark_dirty(message)
+
+
 def bootstrap_telemetry():
     global BOOTSTRAPPED
     global BOOTSTRAP_LOCK
@@ -265,11 +694,27 @@ def bootstrap_telemetry():
         SESSION = Session()
         _log(Message(MessageType.SESSION_STARTED, data=SESSION, product="polib"))
 
-        MACHINE = Machine()
-        _log(Message(MessageType.MACHINE_REGISTERED, data=MACHINE, product="polib"))
+        # Collecting the machine info does blocking network and DNS calls, we do it in background.
+        # The message is logged right away to keep its place and filled in once it finishes.
+        machine_message = Message(MessageType.MACHINE_REGISTERED, data=None, product="polib")
+        _log(machine_message)
+        threading.Thread(
+            target=_register_machine,
+            args=(machine_message, Machine.get_blender_info()),
+            name="polib_telemetry_machine",
+            daemon=True,
+        ).start()
+
+        STREAM_WRITER.start()
 
         # wait 5 seconds to give all addons time to register
-        bpy.app.timers.register(lambda: log_installed_addons(), first_interval=5, persistent=True)
+        timers_bpy.TIMER_REGISTRY.register(
+            __name__,
+            lambda: log_installed_addons(),
+            first_interval=5,
+            persistent=True,
+            name="log_installed_addons",
+        )
 
         BOOTSTRAPPED = True
 
@@ -282,9 +727,35 @@ class TelemetryWrapper:
     def log(self, msg: Message) -> None:
         _log(msg)
 
+    def _log_aggregated(self, type: str, message: str) -> None:
+        # skip this method and the log_* method calling it
+        stack = _capture_stack(2)
+        key = (type, self.product, stack)
+        with MESSAGES.lock:
+            record = AGGREGATED_MESSAGES.get(key, None)
+            if record is not None:
+                record.hit(message)
+                STREAM_WRITER.mark_dirty(record)
+                return
+            record = AggregatedMessage(type, message, stack, self.product)
+            AGGREGATED_MESSAGES[key] = record
+            self.log(record)
+
     def dump(self) -> str:
         global MESSAGES
-        return json.dumps(MESSAGES, indent=4, sort_keys=True, cls=TelemetryJSONEncoder)
+        with MESSAGES.lock:
+            messages = MESSAGES.snapshot()
+            dropped_summary = MESSAGES.get_dropped_summary()
+        if dropped_summary is not None:
+            messages.append(
+                Message(MessageType.MESSAGES_DROPPED, data=dropped_summary, product="polib")
+            )
+        return json.dumps(messages, indent=4, sort_keys=True, cls=TelemetryJSONEncoder)
+
+    def flush(self) -> typing.List[str]:
+        """Writes all telemetry to the stream file, returns paths of the written files"""
+        STREAM_WRITER.flush()
+        return STREAM_WRITER.get_file_paths()
 
     def report_addon(self, bl_info, init_path: str) -> None:
         data = {}
@@ -329,13 +800,7 @@ class TelemetryWrapper:
 
         global VERBOSE_LEVEL
 
-        self.log(
-            Message(
-                MessageType.WARNING_MESSAGE,
-                data=[message] + traceback.extract_stack().format(),
-                product=self.product,
-            )
-        )
+        self._log_aggregated(MessageType.WARNING_MESSAGE, message)
         if VERBOSE_LEVEL <= VerboseLevel.WARNING:
             print(f"WARNING[{self.product}]: {message}")
 
@@ -346,13 +811,7 @@ class TelemetryWrapper:
         """
         global VERBOSE_LEVEL
 
-        self.log(
-            Message(
-                MessageType.DEBUG_MESSAGE,
-                data=[message] + traceback.extract_stack().format(),
-                product=self.product,
-            )
-        )
+        self._log_aggregated(MessageType.DEBUG_MESSAGE, message)
         if VERBOSE_LEVEL <= VerboseLevel.DEBUG:
             print(f"DEBUG[{self.product}]: {message}")
 
@@ -363,13 +822,7 @@ class TelemetryWrapper:
         """
         global VERBOSE_LEVEL
 
-        self.log(
-            Message(
-                MessageType.ERROR_MESSAGE,
-                data=[message] + traceback.extract_stack().format(),
-                product=self.product,
-            )
-        )
+        self._log_aggregated(MessageType.ERROR_MESSAGE, message)
         if VERBOSE_LEVEL <= VerboseLevel.ERROR:
             print(f"ERROR[{self.product}]: {message}")
 
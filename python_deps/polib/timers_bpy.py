@@ -0,0 +1,131 @@
+#!/usr/bin/python3
+# copyright (c) 2018- polygoniq xyz s.r.o.
+
+import bpy
+import logging
+import time
+import typing
+
+logger = logging.getLogger(f"polygoniq.{__name__}")
+
+
+TimerCallback = typing.Callable[[], typing.Optional[float]]
+
+
+class TimerRecord:
+    def __init__(self, owner: str, name: str, persistent: bool, first_interval: float):
+        self.owner = owner
+        self.name = name
+        self.persistent = persistent
+        self.fire_count = 0
+        self.total_duration = 0.0
+        self.max_duration = 0.0
+        # How late the timer fired compared to the interval it asked for
+        self.total_jitter = 0.0
+        self.max_jitter = 0.0
+        self.expected_fire_time = time.monotonic() + first_interval
+
+    def summary(self) -> typing.Dict[str, typing.Any]:
+        """Returns the timer stats, durations are in milliseconds"""
+        fire_count = max(1, self.fire_count)
+        return {
+            "owner": self.owner,
+            "name": self.name,
+            "persistent": self.persistent,
+            "fire_count": self.fire_count,
+            "mean_duration": self.total_duration / fire_count * 1000.0,
+            "max_duration": self.max_duration * 1000.0,
+            "mean_jitter": self.total_jitter / fire_count * 1000.0,
+            "max_jitter": self.max_jitter * 1000.0,
+        }
+
+
+class TimerRegistry:
+    """Registers bpy.app.timers on behalf of owners and keeps track of them.
+
+    Use 'register' instead of bpy.app.timers.register, it returns the function that was actually
+    registered to Blender. That is the handle for 'unregister' and 'is_registered'. Each timer
+    records how many times it fired, how long the callback took and how late it fired. Timers
+    are grouped by owner, usually the registering module's __name__, 'unregister_owner' removes
+    all timers of the owner, call it in the module's unregister().
+    """
+
+    def __init__(self):
+        # id of the registered function -> (registered function, record)
+        self._timers: typing.Dict[int, typing.Tuple[TimerCallback, TimerRecord]] = {}
+
+    def register(
+        self,
+        owner: str,
+        callback: TimerCallback,
+        first_interval: float = 0.0,
+        persistent: bool = False,
+        name: typing.Optional[str] = None,
+    ) -> TimerCallback:
+        if name is None:
+            name = getattr(callback, "__qualname__", repr(callback))
+        record = TimerRecord(owner, name, persistent, first_interval)
+
+        def timer() -> typing.Optional[float]:
+            start_time = time.monotonic()
+            jitter = max(0.0, start_time - record.expected_fire_time)
+            try:
+                interval = callback()
+            except:
+                # Blender unregisters timers that raise
+                self._timers.pop(id(timer), None)
+                raise
+            end_time = time.monotonic()
+
+            duration = end_time - start_time
+            record.fire_count += 1
+            record.total_duration += duration
+            record.max_duration = max(record.max_duration, duration)
+            record.total_jitter += jitter
+            record.max_jitter = max(record.max_jitter, jitter)
+            if interval is None:
+                self._timers.pop(id(timer), None)
+            else:
+                record.expected_fire_time = end_time + interval
+            return interval
+
+        self._timers[id(timer)] = (timer, record)
+        bpy.app.timers.register(timer, first_interval=first_interval, persistent=persistent)
+        return timer
+
+    def is_registered(self, timer: TimerCallback) -> bool:
+        return id(timer) in self._timers and bpy.app.timers.is_registered(timer)
+
+    def unregister(self, timer: TimerCallback) -> None:
+        self._timers.pop(id(timer), None)
+        if bpy.app.timers.is_registered(timer):
+            bpy.app.timers.unregister(timer)
+
+    def unregister_owner(self, owner: str) -> None:
+        """Unregisters all timers registered by 'owner'"""
+        for timer, record in list(self._timers.values()):
+            if record.owner == owner:
+                self.unregister(timer)
+
+    def prune(self) -> None:
+        """Forgets timers Blender doesn't know anymore, e.g. non-persistent ones after file load"""
+        for key, (timer, _) in list(self._timers.items()):
+            if not bpy.app.timers.is_registered(timer):
+                del self._timers[key]
+
+    def get_summaries(
+        self, owner: typing.Optional[str] = None
+    ) -> typing.List[typing.Dict[str, typing.Any]]:
+        """Returns stats of live timers, of all owners if 'owner' is None"""
+        self.prune()
+        return [
+            record.summary()
+            for _, record in self._timers.values()
+            if owner is None or record.owner == owner
+        ]
+
+    def __len__(self) -> int:
+        return len(self._timers)
+
+
+TIMER_REGISTRY = TimerRegistry()
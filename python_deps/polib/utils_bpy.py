@@ -9,15 +9,14 @@ import pathlib
 import typing
 import datetime
 import functools
-import urllib.request
 import urllib.error
-import ssl
 import json
 import subprocess
 import math
 import time
 import re
 import logging
+from . import http_session
 
 logger = logging.getLogger(f"polygoniq.{__name__}")
 
@@ -385,24 +384,9 @@ def get_addon_release_info(
         url = f"{POLYGONIQ_GITHUB_REPO_API_URL}/{addon_name}/releases/tags/{release_tag}"
     else:
         url = f"{POLYGONIQ_GITHUB_REPO_API_URL}/{addon_name}/releases/latest"
-    request = urllib.request.Request(url)
     try:
-        ssl_context = ssl._create_unverified_context()
-    except:
-        # Some blender packaged python versions don't have this, largely
-        # useful for local network setups otherwise minimal impact.
-        ssl_context = None
-    try:
-        if ssl_context is not None:
-            response = urllib.request.urlopen(request, context=ssl_context)
-        else:
-            response = urllib.request.urlopen(request)
+        return http_session.HTTP_SESSION.get_json(url)
     except (urllib.error.HTTPError, urllib.error.URLError) as e:
         logger.error(e)
-    else:
-        result_string = response.read()
-        response.close()
-        try:
-            return json.JSONDecoder().decode(result_string.decode())
-        except json.JSONDecodeError as e:
-            logger.error("API response has invalid JSON format")
+    except json.JSONDecodeError as e:
+        logger.error("API response has invalid JSON format")
@@ -0,0 +1,199 @@
+# copyright (c) 2018- polygoniq xyz s.r.o.
+# Opt-in profiling of the addon imports and registration
+
+# Set POLYGONIQ_PROFILE_STARTUP=1 to record a hierarchical timing tree of all imports done while
+# the addon initializes and of the steps of its register(). The tree is written to the polygoniq
+# log directory as JSON and as collapsed stacks that can be fed to flamegraph.pl or speedscope.
+#
+# This module can't use polib or bpy, it has to be imported before anything else to see all
+# the imports.
+
+import contextlib
+import importlib.abc
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+import typing
+
+logger = logging.getLogger(f"polygoniq.{__name__}")
+
+
+ENABLED = os.environ.get("POLYGONIQ_PROFILE_STARTUP", "0") == "1"
+
+
+class TimingNode:
+    def __init__(self, name: str, kind: str, start: typing.Optional[float] = None):
+        self.name = name
+        # 'root', 'import' or 'step'
+        self.kind = kind
+        self.start = start if start is not None else time.perf_counter()
+        self.duration = 0.0
+        self.children: typing.List[TimingNode] = []
+
+    @property
+    def self_time(self) -> float:
+        return max(0.0, self.duration - sum(child.duration for child in self.children))
+
+    def as_dict(self, origin: float) -> typing.Dict[str, typing.Any]:
+        return {
+            "name": self.name,
+            "kind": self.kind,
+            "start_ms": (self.start - origin) * 1000.0,
+            "duration_ms": self.duration * 1000.0,
+            "self_ms": self.self_time * 1000.0,
+            "children": [child.as_dict(origin) for child in self.children],
+        }
+
+    def collapsed_stacks(self, prefix: str = "") -> typing.Iterator[str]:
+        """Yields lines in the 'frame;frame;frame value' format, value is self time in µs"""
+        # ';' separates the frames and the last space separates the value
+        frame = self.name.replace(";", ":")
+        stack = f"{prefix};{frame}" if prefix != "" else frame
+        self_us = int(round(self.self_time * 1_000_000))
+        if self_us > 0:
+            yield f"{stack} {self_us}"
+        for child in self.children:
+            yield from child.collapsed_stacks(stack)
+
+
+class StartupProfiler:
+    """Records nested timing sections, imports are recorded automatically by an import hook"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.root = TimingNode(name, "root")
+        self.finished = False
+        self._stack: typing.List[TimingNode] = [self.root]
+        # Imports and sections in other threads would break the nesting, we time the main one only
+        self._thread_id = threading.get_ident()
+        self._finder = ImportTimingFinder(self)
+
+    @contextlib.contextmanager
+    def section(
+        self, name: str, kind: str = "step", start: typing.Optional[float] = None
+    ) -> typing.Iterator[None]:
+        if self.finished or threading.get_ident() != self._thread_id:
+            yield
+            return
+
+        node = TimingNode(name, kind, start)
+        self._stack[-1].children.append(node)
+        self._stack.append(node)
+        try:
+            yield
+        finally:
+            node.duration = time.perf_counter() - node.start
+            self._stack.pop()
+
+    def install_import_hook(self) -> None:
+        if self._finder not in sys.meta_path:
+            sys.meta_path.insert(0, self._finder)
+
+    def remove_import_hook(self) -> None:
+        if self._finder in sys.meta_path:
+            sys.meta_path.remove(self._finder)
+
+    def finish(self) -> None:
+        if self.finished:
+            return
+        self.remove_import_hook()
+        self.root.duration = time.perf_counter() - self.root.start
+        self.finished = True
+
+    def write_report(self, directory: str) -> typing.Tuple[str, str]:
+        """Writes the JSON tree and the collapsed stacks to 'directory', returns their paths"""
+        os.makedirs(directory, exist_ok=True)
+        json_path = os.path.join(directory, f"{self.name}_startup_profile.json")
+        with open(json_path, "w") as f:
+            json.dump(self.root.as_dict(self.root.start), f, indent=4)
+        collapsed_path = os.path.join(directory, f"{self.name}_startup_profile.folded")
+        with open(collapsed_path, "w") as f:
+            for line in self.root.collapsed_stacks():
+                f.write(line + "\n")
+        return json_path, collapsed_path
+
+
+class ImportTimingLoader(importlib.abc.Loader):
+    """Wraps the loader found by other finders and times the module creation and execution"""
+
+    def __init__(self, loader: importlib.abc.Loader, profiler: StartupProfiler, fullname: str):
+        self._loader = loader
+        self._profiler = profiler
+        self._fullname = fullname
+        self._start: typing.Optional[float] = None
+
+    def create_module(self, spec):
+        self._start = time.perf_counter()
+        create_module = getattr(self._loader, "create_module", None)
+        if create_module is None:
+            return None
+        return create_module(spec)
+
+    def exec_module(self, module) -> None:
+        # Put the original loader back, the module should look as if it was imported normally
+        module.__loader__ = self._loader
+        if getattr(module, "__spec__", None) is not None:
+            module.__spec__.loader = self._loader
+        with self._profiler.section(self._fullname, "import", self._start):
+            self._loader.exec_module(module)
+
+    def __getattr__(self, name: str) -> typing.Any:
+        return getattr(self._loader, name)
+
+
+class ImportTimingFinder(importlib.abc.MetaPathFinder):
+    def __init__(self, profiler: StartupProfiler):
+        self._profiler = profiler
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self:
+                continue
+            find_spec = getattr(finder, "find_spec", None)
+            if find_spec is None:
+                continue
+            spec = find_spec(fullname, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+
+        if spec.loader is None or not hasattr(spec.loader, "exec_module"):
+            return spec
+        spec.loader = ImportTimingLoader(spec.loader, self._profiler, fullname)
+        return spec
+
+
+PROFILER: typing.Optional[StartupProfiler] = None
+if ENABLED:
+    PROFILER = StartupProfiler(__name__.rsplit(".", 1)[0])
+    PROFILER.install_import_hook()
+
+
+def section(name: str) -> typing.ContextManager[None]:
+    """Times the 'name' step of the startup, does nothing if profiling isn't enabled"""
+    if PROFILER is None:
+        return contextlib.nullcontext()
+    return PROFILER.section(name)
+
+
+def finish() -> None:
+    """Stops the profiling and writes the report to the polygoniq log directory"""
+    if PROFILER is None or PROFILER.finished:
+        return
+
+    PROFILER.finish()
+    try:
+        json_path, collapsed_path = PROFILER.write_report(
+            os.path.join(tempfile.gettempdir(), "polygoniq_logs")
+        )
+        logger.info(
+            f"Startup took {PROFILER.root.duration * 1000.0:.1f} ms, profile written to "
+            f"{json_path} and {collapsed_path}"
+        )
+    except:
+        logger.exception("Can't write startup profile")
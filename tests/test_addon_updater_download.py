@@ -0,0 +1,230 @@
+#!/usr/bin/python3
+# copyright (c) 2018- polygoniq xyz s.r.o.
+
+"""Tests of resumable update downloads of addon_updater against a local HTTP server.
+
+The server supports Range requests validated by an ETag in If-Range, can drop the connection in
+the middle of a response and can be switched to ignore Range headers altogether.
+
+Usage:
+    python -m unittest discover tests
+"""
+
+import http.server
+import importlib.util
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import types
+import unittest
+import unittest.mock
+
+
+ADDON_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+PACKAGE = "blenderkitty"
+
+
+def load_addon_updater() -> types.ModuleType:
+    """Imports addon_updater as a submodule of the addon package, without registering the addon"""
+    # Downloads touch only bpy.context when reporting progress, outside Blender bare modules
+    # are enough for the module level imports.
+    for name in ["bpy", "addon_utils"]:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            module = types.ModuleType(name)
+            module.context = types.SimpleNamespace()
+            sys.modules[name] = module
+
+    if PACKAGE not in sys.modules:
+        package = types.ModuleType(PACKAGE)
+        package.__path__ = [ADDON_DIR]
+        sys.modules[PACKAGE] = package
+    name = f"{PACKAGE}.addon_updater"
+    if name not in sys.modules:
+        spec = importlib.util.spec_from_file_location(
+            name, os.path.join(ADDON_DIR, "addon_updater.py")
+        )
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        spec.loader.exec_module(module)
+    return sys.modules[name]
+
+
+addon_updater = load_addon_updater()
+
+PAYLOAD = os.urandom(3 * 1024 * 1024 + 123)
+
+
+class RangeRequestHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        server = self.server
+        range_header = self.headers.get("Range", None)
+        if_range = self.headers.get("If-Range", None)
+        server.requests.append((range_header, if_range))
+
+        start = 0
+        if range_header is not None and server.accept_ranges and if_range == server.etag:
+            start = int(range_header[len("bytes=") :].rstrip("-"))
+            if start >= len(PAYLOAD):
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(PAYLOAD)}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{len(PAYLOAD) - 1}/{len(PAYLOAD)}")
+        else:
+            self.send_response(200)
+        if server.accept_ranges:
+            self.send_header("Accept-Ranges", "bytes")
+            self.send_header("ETag", server.etag)
+        self.send_header("Content-Length", str(len(PAYLOAD) - start))
+        self.end_headers()
+
+        body = PAYLOAD[start:]
+        if server.drop_after is not None:
+            # Only the first response is cut
+            drop_after = server.drop_after
+            server.drop_after = None
+            self.wfile.write(body[:drop_after])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+
+class DownloadTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), RangeRequestHandler)
+        cls.server.daemon_threads = True
+        cls.server_thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.server_thread.start()
+        cls.url = f"http://127.0.0.1:{cls.server.server_port}/source.zip"
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self) -> None:
+        self.server.requests = []
+        self.server.etag = '"v1"'
+        self.server.accept_ranges = True
+        self.server.drop_after = None
+
+        self.directory = tempfile.mkdtemp()
+        self.updater = addon_updater.SingletonUpdater()
+        self.updater._updater_path = self.directory
+        self.part_path, self.meta_path = self.updater.get_partial_download_paths()
+        self.filepath = os.path.join(self.directory, "source.zip")
+
+        # Retries would wait for seconds otherwise
+        patcher = unittest.mock.patch.object(
+            addon_updater, "DOWNLOAD_MAX_MAIN_THREAD_RETRY_DELAY", 0.0
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.directory)
+
+    def write_partial_download(self, data: bytes, validator: str, url: str = None) -> None:
+        with open(self.part_path, "wb") as f:
+            f.write(data)
+        with open(self.meta_path, "w") as f:
+            json.dump({"url": url or self.url, "validator": validator}, f)
+
+    def download(self) -> None:
+        self.updater.download_resumable(self.url, self.filepath)
+        with open(self.filepath, "rb") as f:
+            self.assertEqual(f.read(), PAYLOAD)
+        self.assertFalse(os.path.exists(self.part_path))
+        self.assertFalse(os.path.exists(self.meta_path))
+
+    def test_download(self) -> None:
+        progress = []
+        self.updater.download_progress_callback = lambda *args: progress.append(args)
+        self.download()
+        self.assertEqual(self.server.requests, [(None, None)])
+        self.assertEqual(progress[-1][0], len(PAYLOAD))
+        self.assertEqual(self.updater.download_progress, 1.0)
+
+    def test_resume_dropped_connection(self) -> None:
+        self.server.drop_after = 1024 * 1024 + 7
+        self.download()
+        self.assertEqual(
+            self.server.requests, [(None, None), (f"bytes={1024 * 1024 + 7}-", '"v1"')]
+        )
+
+    def test_resume_previous_download(self) -> None:
+        self.write_partial_download(PAYLOAD[:1000], '"v1"')
+        self.download()
+        self.assertEqual(self.server.requests, [("bytes=1000-", '"v1"')])
+
+    def test_changed_validator_restarts(self) -> None:
+        # The file changed on the server since the partial download, it's sent whole
+        self.write_partial_download(b"x" * 1000, '"v0"')
+        self.download()
+        self.assertEqual(self.server.requests, [("bytes=1000-", '"v0"')])
+
+    def test_other_url_restarts(self) -> None:
+        self.write_partial_download(b"x" * 1000, '"v1"', url="http://127.0.0.1/other.zip")
+        self.download()
+        self.assertEqual(self.server.requests, [(None, None)])
+
+    def test_range_not_satisfiable_restarts(self) -> None:
+        # The partial file is complete or longer, the server answers 416
+        self.write_partial_download(PAYLOAD + b"x", '"v1"')
+        self.download()
+        self.assertEqual(
+            self.server.requests, [(f"bytes={len(PAYLOAD) + 1}-", '"v1"'), (None, None)]
+        )
+
+    def test_server_without_ranges_restarts(self) -> None:
+        self.server.accept_ranges = False
+        self.server.drop_after = 1024 * 1024
+        self.download()
+        self.assertEqual(self.server.requests, [(None, None), (None, None)])
+
+    def test_retries_exhausted(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+        try:
+            with unittest.mock.patch.object(addon_updater, "DOWNLOAD_RETRIES", 2):
+                with self.assertRaises(OSError):
+                    self.updater.download_resumable(self.url, self.filepath)
+            self.assertFalse(os.path.exists(self.filepath))
+        finally:
+            self.setUpClass()
+
+    def test_retry_delay_capped_on_main_thread(self) -> None:
+        with unittest.mock.patch.object(
+            addon_updater, "DOWNLOAD_MAX_MAIN_THREAD_RETRY_DELAY", 0.5
+        ):
+            delays = [
+                self.updater.get_download_retry_delay(attempt)
+                for attempt in range(1, addon_updater.DOWNLOAD_RETRIES + 1)
+            ]
+            self.assertLessEqual(max(delays), 0.5)
+
+            background_delays = []
+            thread = threading.Thread(
+                target=lambda: background_delays.append(self.updater.get_download_retry_delay(3))
+            )
+            thread.start()
+            thread.join()
+            self.assertEqual(background_delays, [addon_updater.DOWNLOAD_RETRY_DELAY * 3])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,167 @@
+#!/usr/bin/python3
+# copyright (c) 2018- polygoniq xyz s.r.o.
+
+"""Tests of polib.http_session against a local HTTP server.
+
+Covers reuse of keep-alive connections, revalidation of cached responses with ETags and that
+responses to requests with credentials are not cached.
+
+Usage:
+    python -m unittest discover tests
+"""
+
+import http.server
+import json
+import os
+import shutil
+import stat
+import sys
+import tempfile
+import threading
+import unittest
+import urllib.error
+
+
+ADDON_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+# http_session doesn't depend on bpy nor on the rest of polib
+sys.path.insert(0, os.path.join(ADDON_DIR, "python_deps", "polib"))
+import http_session  # noqa: E402
+
+
+class ETagRequestHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+    def setup(self) -> None:
+        super().setup()
+        self.server.connections += 1
+
+    def do_GET(self) -> None:
+        server = self.server
+        server.requests.append((self.path, self.headers.get("If-None-Match", None)))
+        if self.path == "/missing":
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        if self.headers.get("If-None-Match", None) == server.etag:
+            self.send_response(304)
+            self.send_header("ETag", server.etag)
+            self.end_headers()
+        else:
+            body = json.dumps(server.payload).encode("utf-8")
+            self.send_response(200)
+            self.send_header("ETag", server.etag)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        if server.drop_idle:
+            # Closes the connection without telling the client, as idle timeouts do
+            self.close_connection = True
+
+
+class HttpSessionTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), ETagRequestHandler)
+        cls.server.daemon_threads = True
+        cls.server_thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.server_thread.start()
+        cls.url = f"http://127.0.0.1:{cls.server.server_port}"
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self) -> None:
+        self.server.connections = 0
+        self.server.requests = []
+        self.server.etag = '"v1"'
+        self.server.payload = {"version": [1, 0, 0]}
+        self.server.drop_idle = False
+
+        self.directory = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.directory, "cache")
+        self.session = http_session.HttpSession(self.cache_dir, timeout=5.0)
+        self.addCleanup(self.session.close)
+        # Requests must not go through a proxy configured in the environment
+        for name in ["http_proxy", "HTTP_PROXY", "no_proxy", "NO_PROXY"]:
+            value = os.environ.pop(name, None)
+            if value is not None:
+                self.addCleanup(os.environ.__setitem__, name, value)
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.directory)
+
+    def test_connection_reused(self) -> None:
+        for i in range(5):
+            self.session.get(f"{self.url}/release/{i}")
+        self.assertEqual(self.server.connections, 1)
+        self.assertEqual(len(self.server.requests), 5)
+
+    def test_reconnect_after_server_closed_connection(self) -> None:
+        self.server.drop_idle = True
+        for i in range(3):
+            self.assertEqual(
+                self.session.get_json(f"{self.url}/release/{i}"), {"version": [1, 0, 0]}
+            )
+        self.assertEqual(self.server.connections, 3)
+
+    def test_not_modified_served_from_cache(self) -> None:
+        first = self.session.get_json(f"{self.url}/release")
+        second = self.session.get_json(f"{self.url}/release")
+        self.assertEqual(first, {"version": [1, 0, 0]})
+        # Not parsed again
+        self.assertIs(first, second)
+        self.assertEqual(self.server.requests, [("/release", None), ("/release", '"v1"')])
+
+        # A new session revalidates the response cached on disk
+        session = http_session.HttpSession(self.cache_dir, timeout=5.0)
+        self.addCleanup(session.close)
+        self.assertEqual(session.get_json(f"{self.url}/release"), first)
+        self.assertEqual(self.server.requests[-1], ("/release", '"v1"'))
+
+    def test_modified_response_replaces_cache(self) -> None:
+        self.session.get_json(f"{self.url}/release")
+        self.server.etag = '"v2"'
+        self.server.payload = {"version": [2, 0, 0]}
+        self.assertEqual(self.session.get_json(f"{self.url}/release"), {"version": [2, 0, 0]})
+        self.assertEqual(self.session.get_json(f"{self.url}/release"), {"version": [2, 0, 0]})
+        self.assertEqual(self.server.requests[-1], ("/release", '"v2"'))
+
+    def test_credentials_not_cached(self) -> None:
+        headers = {"PRIVATE-TOKEN": "secret"}
+        self.session.get(f"{self.url}/release", headers)
+        self.session.get(f"{self.url}/release", headers)
+        self.assertEqual(self.server.requests, [("/release", None), ("/release", None)])
+        if os.path.isdir(self.cache_dir):
+            self.assertEqual(os.listdir(self.cache_dir), [])
+
+    @unittest.skipUnless(hasattr(os, "getuid"), "No uids on this platform")
+    def test_cache_dir_private(self) -> None:
+        self.session.get(f"{self.url}/release")
+        self.assertEqual(stat.S_IMODE(os.stat(self.cache_dir).st_mode) & 0o077, 0)
+        self.assertGreater(len(os.listdir(self.cache_dir)), 0)
+
+    @unittest.skipUnless(hasattr(os, "getuid"), "No uids on this platform")
+    def test_shared_cache_dir_not_used(self) -> None:
+        os.makedirs(self.cache_dir)
+        os.chmod(self.cache_dir, 0o777)
+        self.session.get(f"{self.url}/release")
+        self.session.get(f"{self.url}/release")
+        self.assertEqual(self.server.requests, [("/release", None), ("/release", None)])
+        self.assertEqual(os.listdir(self.cache_dir), [])
+
+    def test_http_error(self) -> None:
+        with self.assertRaises(urllib.error.HTTPError) as context:
+            self.session.get(f"{self.url}/missing")
+        self.assertEqual(context.exception.code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,234 @@
+#!/usr/bin/python3
+# copyright (c) 2018- polygoniq xyz s.r.o.
+
+"""Tests of polib.split_file_reader on data split into files of uneven, also empty, sizes.
+
+Covers seeking and reading across the file boundaries in all modes of the reader, pread, the pool
+of open files, hashers and parallel extraction of split zips.
+
+Usage:
+    python -m unittest discover tests
+"""
+
+import hashlib
+import io
+import os
+import random
+import shutil
+import sys
+import tempfile
+import unittest
+import warnings
+import zipfile
+import zlib
+
+
+ADDON_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+# split_file_reader doesn't depend on bpy nor on the rest of polib
+sys.path.insert(0, os.path.join(ADDON_DIR, "python_deps", "polib"))
+import split_file_reader  # noqa: E402
+
+
+PART_SIZES = [7, 0, 1000, 1, 4096, 0, 333]
+
+MODES = {
+    "scan": {},
+    "index": {"use_index": True},
+    "mmap": {"use_mmap": True},
+    "prefetch": {"prefetch_blocks": 2, "prefetch_block_size": 100},
+}
+
+
+def write_parts(directory: str, data: bytes, sizes: list) -> list:
+    paths = []
+    offset = 0
+    for i, size in enumerate(sizes):
+        path = os.path.join(directory, f"part.{i:03d}")
+        with open(path, "wb") as f:
+            f.write(data[offset : offset + size])
+        paths.append(path)
+        offset += size
+    return paths
+
+
+class SplitFileReaderTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+        self.data = random.Random(0).randbytes(sum(PART_SIZES))
+        self.parts = write_parts(self.directory, self.data, PART_SIZES)
+        self.boundaries = [0]
+        for size in PART_SIZES:
+            self.boundaries.append(self.boundaries[-1] + size)
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.directory)
+
+    def test_seek_tell_across_boundaries(self) -> None:
+        for mode, kwargs in MODES.items():
+            with self.subTest(mode=mode), split_file_reader.SplitFileReader(
+                self.parts, **kwargs
+            ) as reader:
+                for boundary in self.boundaries:
+                    for offset in [boundary - 1, boundary, boundary + 1]:
+                        if offset < 0 or offset > len(self.data):
+                            continue
+                        self.assertEqual(reader.seek(offset, os.SEEK_SET), offset)
+                        self.assertEqual(reader.tell(), offset)
+                        self.assertEqual(reader.read(5), self.data[offset : offset + 5])
+
+                        reader.seek(offset, os.SEEK_SET)
+                        self.assertEqual(reader.seek(-3, os.SEEK_CUR), max(0, offset - 3))
+                        self.assertEqual(reader.seek(offset - len(self.data), os.SEEK_END), offset)
+                        self.assertEqual(reader.read(5), self.data[offset : offset + 5])
+
+    def test_read_return_values(self) -> None:
+        for mode, kwargs in MODES.items():
+            with self.subTest(mode=mode), split_file_reader.SplitFileReader(
+                self.parts, **kwargs
+            ) as reader:
+                data = reader.read(1500)
+                self.assertIs(type(data), bytes)
+                self.assertEqual(data, self.data[:1500])
+
+                data = reader.read1(4000)
+                self.assertIs(type(data), bytes)
+                self.assertLessEqual(len(data), 4000)
+                self.assertEqual(data, self.data[1500 : 1500 + len(data)])
+
+                reader.seek(len(self.data) - 10)
+                data = reader.read(100)
+                self.assertIs(type(data), bytes)
+                self.assertEqual(data, self.data[-10:])
+                self.assertEqual(reader.read(100), b"")
+                self.assertEqual(reader.read(), b"")
+
+                reader.seek(3)
+                data = reader.read()
+                self.assertIs(type(data), bytes)
+                self.assertEqual(data, self.data[3:])
+
+    def test_readinto(self) -> None:
+        for mode, kwargs in MODES.items():
+            with self.subTest(mode=mode), split_file_reader.SplitFileReader(
+                self.parts, **kwargs
+            ) as reader:
+                buffer = bytearray(2000)
+                self.assertEqual(reader.readinto(buffer), 2000)
+                self.assertEqual(buffer, self.data[:2000])
+                self.assertEqual(reader.tell(), 2000)
+
+                read = reader.readinto1(buffer)
+                self.assertLessEqual(read, 2000)
+                self.assertEqual(buffer[:read], self.data[2000 : 2000 + read])
+
+                reader.seek(len(self.data) - 10)
+                self.assertEqual(reader.readinto(buffer), 10)
+                self.assertEqual(buffer[:10], self.data[-10:])
+                self.assertEqual(reader.readinto(buffer), 0)
+
+    def test_pread_keeps_position(self) -> None:
+        for mode, kwargs in MODES.items():
+            with self.subTest(mode=mode), split_file_reader.SplitFileReader(
+                self.parts, **kwargs
+            ) as reader:
+                reader.seek(123)
+                for offset in self.boundaries:
+                    self.assertEqual(reader.pread(offset, 50), self.data[offset : offset + 50])
+                self.assertEqual(reader.pread(len(self.data) - 5, 50), self.data[-5:])
+                self.assertEqual(reader.tell(), 123)
+                self.assertEqual(reader.read(10), self.data[123:133])
+
+    def test_max_open_files(self) -> None:
+        with split_file_reader.SplitFileReader(self.parts, max_open_files=1) as reader:
+            self.assertEqual(reader.read(), self.data)
+            self.assertEqual(list(reader._open_files), [len(self.parts) - 1])
+            last_file = reader._open_files[len(self.parts) - 1]
+
+            # Jumping back opens the first file again, the last one is closed to make room for it
+            reader.seek(0)
+            self.assertEqual(reader.read(3), self.data[:3])
+            self.assertEqual(list(reader._open_files), [0])
+            self.assertTrue(last_file.closed)
+
+        with split_file_reader.SplitFileReader(self.parts, max_open_files=3) as reader:
+            reader.seek(len(self.data) - 1)
+            reader.seek(0)
+            reader.seek(len(self.data) - 1)
+            # The last file was used most recently, it's kept open
+            self.assertLessEqual(len(reader._open_files), 3)
+            self.assertIn(len(self.parts) - 1, reader._open_files)
+
+    def test_prefetch_identical(self) -> None:
+        chunk_sizes = [1, 7, 100, 999, 5000]
+        results = []
+        for kwargs in [{}, {"prefetch_blocks": 3, "prefetch_block_size": 64}]:
+            with split_file_reader.SplitFileReader(self.parts, **kwargs) as reader:
+                chunks = []
+                for i in range(100):
+                    chunk = reader.read(chunk_sizes[i % len(chunk_sizes)])
+                    if len(chunk) == 0:
+                        break
+                    chunks.append(chunk)
+                results.append(b"".join(chunks))
+        self.assertEqual(results[0], self.data)
+        self.assertEqual(results[1], self.data)
+
+    def test_hashers(self) -> None:
+        for mode, kwargs in MODES.items():
+            with self.subTest(mode=mode), split_file_reader.SplitFileReader(
+                self.parts, **kwargs
+            ) as reader:
+                sha256 = reader.attach_hasher(hashlib.sha256())
+                crc32 = reader.attach_hasher(split_file_reader.Crc32Hasher())
+                reader.read(10)
+                reader.readinto(bytearray(1500))
+                reader.read1(100)
+                reader.pread(0, 100)
+                reader.read()
+                self.assertEqual(sha256.hexdigest(), hashlib.sha256(self.data).hexdigest())
+                self.assertEqual(crc32.hexdigest(), f"{zlib.crc32(self.data):08x}")
+
+    def test_extract_split_zip(self) -> None:
+        rng = random.Random(1)
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr("dir/", b"")
+            for i in range(20):
+                data = rng.randbytes(rng.randint(0, 50000))
+                archive.writestr(f"dir/sub{i % 3}/file{i}.bin", data)
+            archive.writestr("../outside.txt", b"sanitized")
+            with warnings.catch_warnings():
+                # Duplicate names are intentional, the last member wins
+                warnings.simplefilter("ignore", UserWarning)
+                archive.writestr("text.txt", b"first")
+                archive.writestr("text.txt", b"last wins")
+        data = buffer.getvalue()
+        sizes = []
+        while sum(sizes) < len(data):
+            sizes.append(rng.choice([0, 1, 1000, 30000]))
+        parts_directory = os.path.join(self.directory, "zip")
+        os.mkdir(parts_directory)
+        parts = write_parts(parts_directory, data, sizes)
+
+        expected_directory = os.path.join(self.directory, "expected")
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            archive.extractall(expected_directory)
+        extracted_directory = os.path.join(self.directory, "extracted")
+        paths = split_file_reader.extract_split_zip(parts, extracted_directory, workers=3)
+
+        def read_tree(root: str) -> dict:
+            tree = {}
+            for directory, _, filenames in os.walk(root):
+                tree[os.path.relpath(directory, root)] = None
+                for filename in filenames:
+                    path = os.path.join(directory, filename)
+                    with open(path, "rb") as f:
+                        tree[os.path.relpath(path, root)] = f.read()
+            return tree
+
+        self.assertEqual(read_tree(extracted_directory), read_tree(expected_directory))
+        self.assertTrue(all(os.path.exists(path) for path in paths))
+
+
+if __name__ == "__main__":
+    unittest.main()